@@ -1,20 +1,112 @@
 """API client module for Eloverblik API."""
 
-import json
 import logging
+import random
 import time
+from pathlib import Path
 
+import orjson
 import requests
+from requests.adapters import HTTPAdapter
+
+from powerview.src.ratelimit import RateLimiter
 
 logger = logging.getLogger(__name__)
 
 
-def get_metering_points(access_token: str) -> dict:
+def _create_session() -> requests.Session:
+    """Create a session whose connection pool keeps sockets to the API alive between calls."""
+
+    session = requests.Session()
+    session.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=16))
+    return session
+
+
+_SESSION = _create_session()
+
+# Exponential backoff schedule for retryable responses (429/503)
+RETRY_BASE_DELAY = 1.0
+RETRY_MAX_DELAY = 30.0
+RETRY_JITTER = 0.5
+_random = random.SystemRandom()
+
+# Transient statuses worth retrying; any other HTTP error is final
+RETRYABLE_STATUS_CODES = frozenset({408, 429, 500, 502, 503, 504})
+
+
+class NonRetryableError(requests.HTTPError):
+    """HTTP error that retrying cannot fix, such as an expired token or a bad request."""
+
+
+# Metering points rarely change, so cached responses are reused for the token lifetime
+METERING_POINTS_CACHE_TTL = 24 * 60 * 60
+
+
+def get_session() -> requests.Session:
+    """
+    Return the shared HTTP session used for all Eloverblik API calls.
+
+    Reusing one session lets consecutive requests share a keep-alive connection
+    instead of paying a fresh TCP and TLS handshake per call.
+
+    Returns:
+        The module-level requests.Session instance.
+    """
+    return _SESSION
+
+
+def _retry_delay(response: requests.Response, attempt: int) -> float:
+    """Return seconds to wait before retry ``attempt``, preferring the server's Retry-After."""
+
+    retry_after = response.headers.get("Retry-After")
+    if retry_after and retry_after.isdigit():
+        return float(retry_after)
+
+    backoff = min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * (2**attempt))
+    return backoff * (1 + _random.uniform(0, RETRY_JITTER))
+
+
+def metering_points_cache_path(data_storage_path: str | Path) -> Path:
+    """
+    Return the default on-disk cache location for the metering points response.
+
+    Args:
+        data_storage_path: Base data directory (``DATA_STORAGE_PATH``).
+
+    Returns:
+        Path to ``<data_storage_path>/.cache/metering_points.json``.
+    """
+    return Path(data_storage_path) / ".cache" / "metering_points.json"
+
+
+def _read_cached_response(cache_path: Path, ttl: float) -> dict | None:
+    """Return the cached JSON body if the file exists and is younger than ``ttl`` seconds."""
+
+    try:
+        if time.time() - cache_path.stat().st_mtime >= ttl:
+            return None
+        return orjson.loads(cache_path.read_bytes())
+    except (OSError, ValueError) as e:
+        logger.debug("Ignoring unusable cache file %s: %s", cache_path, e)
+        return None
+
+
+def get_metering_points(
+    access_token: str,
+    session: requests.Session | None = None,
+    cache_path: str | Path | None = None,
+) -> dict:
     """
     Retrieve all available metering points for the authenticated user.
 
+    When ``cache_path`` is given, a response cached there within the last
+    24 hours is returned without contacting the API, and fresh responses are
+    written back to it.
+
     Args:
         access_token: The access token from get_access_token().
+        session: Optional HTTP session. Defaults to the shared module session.
+        cache_path: Optional JSON file used as a time-limited response cache.
 
     Returns:
         Dictionary containing metering points data from the API.
@@ -22,18 +114,37 @@ def get_metering_points(access_token: str) -> dict:
     Raises:
         requests.HTTPError: If the request fails.
     """
+    if cache_path is not None:
+        cache_path = Path(cache_path)
+        cached = _read_cached_response(cache_path, METERING_POINTS_CACHE_TTL)
+        if cached is not None:
+            logger.info("Using cached metering points from %s", cache_path)
+            return cached
+
     url = "https://api.eloverblik.dk/CustomerApi/api/meteringpoints/meteringpoints"
-    headers = {"Authorization": f"Bearer {access_token}"}
+    headers = {"Authorization": f"Bearer {access_token}", "Accept-Encoding": "gzip, deflate"}
 
     logger.info("Requesting metering points from Eloverblik API")
-    response = requests.get(url, headers=headers)
+    response = (session or _SESSION).get(url, headers=headers)
     response.raise_for_status()
 
-    return response.json()
+    data = orjson.loads(response.content)
+    if cache_path is not None:
+        try:
+            cache_path.parent.mkdir(parents=True, exist_ok=True)
+            cache_path.write_bytes(orjson.dumps(data))
+        except OSError as e:
+            logger.warning("Failed to write metering points cache %s: %s", cache_path, e)
+
+    return data
 
 
 def get_meter_data(
-    access_token: str, date_from: str, date_to: str, metering_point_ids: list[str] | None = None
+    access_token: str,
+    date_from: str,
+    date_to: str,
+    metering_point_ids: list[str] | None = None,
+    session: requests.Session | None = None,
 ) -> dict:
     """
     Retrieve meter data for the specified date range with hourly aggregation.
@@ -44,17 +155,20 @@ def get_meter_data(
         date_to: End date in "YYYY-MM-DD" format.
         metering_point_ids: List of metering point IDs to fetch. If None or empty,
                            API will return data for all available metering points.
+        session: Optional HTTP session. Defaults to the shared module session.
 
     Returns:
         Dictionary containing meter data for requested metering points.
 
     Raises:
-        requests.HTTPError: If the request fails.
+        NonRetryableError: If the API rejects the request with a non-transient status.
+        requests.HTTPError: If the request fails with a transient status.
     """
     url = f"https://api.eloverblik.dk/CustomerApi/api/meterdata/gettimeseries/{date_from}/{date_to}/Hour"
     headers = {
         "Authorization": f"Bearer {access_token}",
         "Content-Type": "application/json",
+        "Accept-Encoding": "gzip, deflate",
         "api-version": "1.0",
     }
     payload = {
@@ -63,16 +177,23 @@ def get_meter_data(
 
     logger.info("Requesting meter data from %s to %s with Hour aggregation", date_from, date_to)
 
-    # Debug: Print curl equivalent command
-    headers_str = " ".join([f'-H "{k}: {v}"' for k, v in headers.items()])
-    payload_str = json.dumps(payload)
-    curl_command = f"curl -X 'POST' '{url}' {headers_str} -d '{payload_str}'"
-    logger.debug("Equivalent curl command:\n%s", curl_command)
+    # Debug: Print curl equivalent command with the bearer token redacted
+    if logger.isEnabledFor(logging.DEBUG):
+        redacted = {**headers, "Authorization": "Bearer ***"}
+        headers_str = " ".join([f'-H "{k}: {v}"' for k, v in redacted.items()])
+        payload_str = orjson.dumps(payload).decode()
+        curl_command = f"curl -X 'POST' '{url}' {headers_str} -d '{payload_str}'"
+        logger.debug("Equivalent curl command:\n%s", curl_command)
 
-    response = requests.post(url, headers=headers, json=payload)
-    response.raise_for_status()
+    response = (session or _SESSION).post(url, headers=headers, json=payload)
+    try:
+        response.raise_for_status()
+    except requests.HTTPError as e:
+        if e.response is not None and e.response.status_code not in RETRYABLE_STATUS_CODES:
+            raise NonRetryableError(*e.args, request=e.request, response=e.response) from e
+        raise
 
-    return response.json()
+    return orjson.loads(response.content)
 
 
 def get_meter_data_with_retry(
@@ -81,12 +202,18 @@ def get_meter_data_with_retry(
     date_to: str,
     metering_point_ids: list[str] | None = None,
     max_retries: int = 3,
+    session: requests.Session | None = None,
+    rate_limiter: RateLimiter | None = None,
 ) -> dict:
     """
     Fetch meter data with retry logic for rate limiting and service errors.
 
-    Handles HTTP 429 (rate limited) and HTTP 503 (service unavailable) by
-    waiting 1 minute and retrying. Other HTTP errors are raised immediately.
+    Handles transient HTTP errors (RETRYABLE_STATUS_CODES: timeouts, rate
+    limiting and 5xx gateway/service errors) by waiting and retrying. The wait
+    honors the server's Retry-After header when present, otherwise it backs off
+    exponentially with random jitter so that concurrent workers do not retry in
+    lockstep. Other HTTP errors, including NonRetryableError, are raised
+    immediately.
 
     Args:
         access_token: The access token.
@@ -95,6 +222,8 @@ def get_meter_data_with_retry(
         metering_point_ids: List of metering point IDs to fetch. If None or empty,
                            API will return data for all available metering points.
         max_retries: Maximum number of retries (default: 3).
+        session: Optional HTTP session. Defaults to the shared module session.
+        rate_limiter: Optional limiter consulted before every attempt, including retries.
 
     Returns:
         Dictionary containing meter data.
@@ -104,21 +233,27 @@ def get_meter_data_with_retry(
     """
     retries = 0
     while retries < max_retries:
+        if rate_limiter is not None:
+            rate_limiter.wait_for_token()
         try:
-            return get_meter_data(access_token, date_from, date_to, metering_point_ids)
+            return get_meter_data(
+                access_token, date_from, date_to, metering_point_ids, session=session
+            )
+        except NonRetryableError:
+            raise
         except requests.exceptions.HTTPError as e:
-            if e.response.status_code in (429, 503):
-                retries += 1
-                if retries >= max_retries:
-                    logger.error("Max retries exceeded for date range %s to %s", date_from, date_to)
-                    raise
-                wait_time = 60
-                logger.warning(
-                    "Rate limited or service unavailable. Waiting %ss before retry %s/%s",
-                    wait_time,
-                    retries,
-                    max_retries,
-                )
-                time.sleep(wait_time)
-            else:
+            if e.response is None or e.response.status_code not in RETRYABLE_STATUS_CODES:
+                raise
+            retries += 1
+            if retries >= max_retries:
+                logger.error("Max retries exceeded for date range %s to %s", date_from, date_to)
                 raise
+            wait_time = _retry_delay(e.response, retries)
+            logger.warning(
+                "Retryable HTTP %s. Waiting %.1fs before retry %s/%s",
+                e.response.status_code,
+                wait_time,
+                retries,
+                max_retries,
+            )
+            time.sleep(wait_time)
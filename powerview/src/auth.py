@@ -1,21 +1,43 @@
 """Authentication module for Eloverblik API."""
 
+import hashlib
 import logging
+import threading
+import time
 
+import orjson
 import requests
 
+from powerview.src.api_client import get_session
+
 logger = logging.getLogger(__name__)
 
+# Access tokens live 24h; reuse them well within that window
+ACCESS_TOKEN_CACHE_TTL = 60 * 60
+
+# Cached access tokens keyed on a hash of the refresh token, with monotonic expiry
+_token_cache: dict[str, tuple[str, float]] = {}
+_token_cache_lock = threading.Lock()
+
+
+def clear_token_cache() -> None:
+    """Forget every cached access token."""
 
-def get_access_token(refresh_token: str) -> str:
+    with _token_cache_lock:
+        _token_cache.clear()
+
+
+def get_access_token(refresh_token: str, session: requests.Session | None = None) -> str:
     """
     Exchange refresh token for an access token.
 
     The Eloverblik API uses a refresh token to obtain a temporary access token
-    valid for 24 hours. A fresh token should be obtained once per extraction run.
+    valid for 24 hours. Tokens are cached in-process for ACCESS_TOKEN_CACHE_TTL
+    seconds, so repeated calls with the same refresh token skip the exchange.
 
     Args:
         refresh_token: The refresh token from environment variables.
+        session: Optional HTTP session. Defaults to the shared API session.
 
     Returns:
         The access token as a string.
@@ -24,13 +46,22 @@ def get_access_token(refresh_token: str) -> str:
         requests.HTTPError: If the token exchange fails.
         KeyError: If the API response doesn't contain the expected "result" field.
     """
+    cache_key = hashlib.sha256(refresh_token.encode()).hexdigest()
+    with _token_cache_lock:
+        cached = _token_cache.get(cache_key)
+    if cached is not None and time.monotonic() < cached[1]:
+        logger.debug("Using cached access token")
+        return cached[0]
+
     url = "https://api.eloverblik.dk/CustomerApi/api/token"
     headers = {"Authorization": f"Bearer {refresh_token}"}
 
     logger.info("Requesting access token from Eloverblik API")
-    response = requests.get(url, headers=headers)
+    response = (session or get_session()).get(url, headers=headers)
     response.raise_for_status()
 
-    token = response.json()["result"]
+    token = orjson.loads(response.content)["result"]
+    with _token_cache_lock:
+        _token_cache[cache_key] = (token, time.monotonic() + ACCESS_TOKEN_CACHE_TTL)
     logger.info("Successfully obtained access token")
     return token
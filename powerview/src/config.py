@@ -1,20 +1,66 @@
 """Configuration management module for Eloverblik data extraction."""
 
 import logging
+import math
 import os
+from collections.abc import Callable
+from functools import lru_cache
 from pathlib import Path
+from types import MappingProxyType
 from typing import Any
 
 import yaml
 from dotenv import load_dotenv
 
+try:
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:  # pragma: no cover - PyYAML built without libyaml
+    from yaml import SafeLoader
+
 logger = logging.getLogger(__name__)
 
 DEFAULT_METERING_POINTS_FILE = "metering_points.yml"
+DEFAULT_MAX_CONCURRENCY = 4
+DEFAULT_REQUESTS_PER_SECOND = 2.0
+
+# (config key, environment variable, default, converter) for plain env-backed settings
+_ENV_SETTINGS: tuple[tuple[str, str, str, Callable[[str], Any]], ...] = (
+    ("data_storage_path", "DATA_STORAGE_PATH", "./data", str),
+    ("analytics_db_path", "ANALYTICS_DB_PATH", "./duckdb/analytics.duckdb", str),
+    ("state_db_path", "STATE_DB_PATH", "./state.duckdb", str),
+    ("log_level", "LOG_LEVEL", "INFO", str),
+    ("initial_backfill_days", "INITIAL_BACKFILL_DAYS", "1095", int),
+    ("max_concurrency", "ELOVERBLIK_MAX_CONCURRENCY", str(DEFAULT_MAX_CONCURRENCY), int),
+    ("requests_per_second", "ELOVERBLIK_RPS", str(DEFAULT_REQUESTS_PER_SECOND), float),
+)
+
 try:
     PACKAGE_ROOT = Path(__file__).resolve().parents[2]
 except IndexError:  # pragma: no cover - fallback for unusual packaging layouts
     PACKAGE_ROOT = Path.cwd()
+_PACKAGE_DEFAULT_METERING_POINTS = (PACKAGE_ROOT / DEFAULT_METERING_POINTS_FILE).resolve()
+
+# .env is parsed at most once per process; see _ensure_dotenv
+_dotenv_loaded = False
+
+# Parsed metering-point files keyed on resolved path, invalidated by mtime
+_metering_points_cache: dict[Path, tuple[int, dict[str, dict[str, Any]]]] = {}
+
+
+def _ensure_dotenv() -> None:
+    """Load ``.env`` into the environment on the first call only."""
+
+    global _dotenv_loaded
+    if not _dotenv_loaded:
+        load_dotenv()
+        _dotenv_loaded = True
+
+
+def _reset_dotenv_loaded() -> None:
+    """Allow the next ``load_config`` call to read ``.env`` again."""
+
+    global _dotenv_loaded
+    _dotenv_loaded = False
 
 
 def _normalize_path(path_value: str | os.PathLike[str]) -> Path:
@@ -27,10 +73,18 @@ def _normalize_path(path_value: str | os.PathLike[str]) -> Path:
         Path: Absolute version of ``path_value``.
     """
 
-    path = Path(path_value).expanduser()
+    # Relative paths depend on the working directory, so it is part of the cache key
+    return _normalize_path_cached(os.path.expanduser(os.fspath(path_value)), os.getcwd())
+
+
+@lru_cache(maxsize=64)
+def _normalize_path_cached(path_value: str, cwd: str) -> Path:
+    """Resolve ``path_value`` against ``cwd``, memoizing the filesystem lookups."""
+
+    path = Path(path_value)
     if path.is_absolute():
         return path.resolve()
-    return (Path.cwd() / path).resolve()
+    return (Path(cwd) / path).resolve()
 
 
 def _resolve_metering_points_path(file_path: str | None = None) -> Path:
@@ -47,21 +101,21 @@ def _resolve_metering_points_path(file_path: str | None = None) -> Path:
     if env_path:
         return _normalize_path(env_path)
 
-    default_candidates = [
-        (Path.cwd() / DEFAULT_METERING_POINTS_FILE).resolve(),
-        (PACKAGE_ROOT / DEFAULT_METERING_POINTS_FILE).resolve(),
-    ]
-
-    for candidate in default_candidates:
-        if candidate.exists():
+    # The working directory can change between calls; the package root cannot
+    cwd_candidate = Path.cwd().resolve() / DEFAULT_METERING_POINTS_FILE
+    for candidate in (cwd_candidate, _PACKAGE_DEFAULT_METERING_POINTS):
+        if candidate.is_file():
             return candidate
 
-    return default_candidates[0]
+    return cwd_candidate
 
 
 def load_metering_points(file_path: str | None = None) -> dict[str, dict[str, Any]]:
     """Load metering point metadata from YAML configuration.
 
+    Parsed results are cached per resolved path and reused until the file's
+    modification time changes.
+
     Args:
         file_path: Optional explicit path to a YAML file.
 
@@ -73,12 +127,18 @@ def load_metering_points(file_path: str | None = None) -> dict[str, dict[str, An
     """
 
     resolved_path = _resolve_metering_points_path(file_path)
-    if not resolved_path.exists():
-        raise ValueError(f"Metering points file not found: {resolved_path}")
+    try:
+        mtime_ns = resolved_path.stat().st_mtime_ns
+    except FileNotFoundError:
+        raise ValueError(f"Metering points file not found: {resolved_path}") from None
+
+    cached = _metering_points_cache.get(resolved_path)
+    if cached is not None and cached[0] == mtime_ns:
+        return {mp_id: dict(metadata) for mp_id, metadata in cached[1].items()}
 
     with resolved_path.open("r", encoding="utf-8") as handle:
         try:
-            raw_data = yaml.safe_load(handle) or {}
+            raw_data = yaml.load(handle, Loader=SafeLoader) or {}
         except yaml.YAMLError as e:
             raise ValueError(f"Failed to parse YAML file {resolved_path}: {e}") from e
 
@@ -115,7 +175,8 @@ def load_metering_points(file_path: str | None = None) -> dict[str, dict[str, An
         len(normalized),
         resolved_path,
     )
-    return normalized
+    _metering_points_cache[resolved_path] = (mtime_ns, normalized)
+    return {mp_id: dict(metadata) for mp_id, metadata in normalized.items()}
 
 
 def load_config() -> dict:
@@ -125,10 +186,11 @@ def load_config() -> dict:
         dict: Fully validated configuration suitable for pipeline execution.
 
     Raises:
-        ValueError: If the refresh token or metering-point definitions are missing.
+        ValueError: If the refresh token or metering-point definitions are missing,
+            or the request concurrency or rate settings are out of range.
     """
 
-    load_dotenv()
+    _ensure_dotenv()
     metering_points = load_metering_points()
     metering_point_ids = {mp_data["name"]: mp_id for mp_id, mp_data in metering_points.items()}
 
@@ -136,18 +198,26 @@ def load_config() -> dict:
         "refresh_token": os.getenv("ELOVERBLIK_REFRESH_TOKEN"),
         "metering_points": metering_points,
         "metering_point_ids": dict(metering_point_ids),
-        "data_storage_path": os.getenv("DATA_STORAGE_PATH", "./data"),
-        "analytics_db_path": os.getenv("ANALYTICS_DB_PATH", "./duckdb/analytics.duckdb"),
-        "state_db_path": os.getenv("STATE_DB_PATH", "./state.duckdb"),
-        "log_level": os.getenv("LOG_LEVEL", "INFO"),
-        "initial_backfill_days": int(os.getenv("INITIAL_BACKFILL_DAYS", "1095")),
+        **{
+            key: convert(os.getenv(env_name, default))
+            for key, env_name, default, convert in _ENV_SETTINGS
+        },
     }
 
     if not config["refresh_token"]:
         logger.error("ELOVERBLIK_REFRESH_TOKEN is required")
         raise ValueError("ELOVERBLIK_REFRESH_TOKEN is required")
 
-    config["valid_metering_points"] = config["metering_point_ids"]
+    if config["max_concurrency"] < 1:
+        logger.error("ELOVERBLIK_MAX_CONCURRENCY must be at least 1")
+        raise ValueError("ELOVERBLIK_MAX_CONCURRENCY must be at least 1")
+
+    if not (math.isfinite(config["requests_per_second"]) and config["requests_per_second"] > 0):
+        logger.error("ELOVERBLIK_RPS must be a positive, finite number")
+        raise ValueError("ELOVERBLIK_RPS must be a positive, finite number")
+
+    # Read-only view over a private copy, so mutating metering_point_ids cannot leak into it
+    config["valid_metering_points"] = MappingProxyType(dict(metering_point_ids))
 
     if not config["valid_metering_points"]:
         logger.error("At least one metering point ID must be configured")
@@ -1,7 +1,13 @@
 """Data extraction and normalization module for Eloverblik data."""
 
 import logging
+from collections.abc import Iterator, Mapping
+from collections.abc import Set as AbstractSet
 from datetime import UTC, date, datetime, timedelta
+from typing import Any
+
+import pyarrow as pa
+import pyarrow.compute as pc
 
 logger = logging.getLogger(__name__)
 
@@ -10,6 +16,7 @@ def get_timeframe(
     metering_point_id: str,
     initial_backfill_days: int = 1095,
     db_path: str = "./state.duckdb",
+    today: date | None = None,
 ) -> tuple[date, date]:
     """
     Calculate the date range for data extraction based on DuckDB state.
@@ -22,16 +29,20 @@ def get_timeframe(
         metering_point_id: The metering point ID.
         initial_backfill_days: Initial backfill period in days (default: 1095).
         db_path: Path to the DuckDB database file.
+        today: End date of the range. Defaults to the current UTC date; callers
+               planning several meters pass one value so every range ends alike.
 
     Returns:
         Tuple of (date_from, date_to) as date objects.
     """
     from powerview.src.storage import get_last_ingestion_date
 
+    if today is None:
+        today = datetime.now(UTC).date()
     last_date = get_last_ingestion_date(metering_point_id, db_path)
 
     if last_date is None:
-        date_from = datetime.now(UTC).date() - timedelta(days=initial_backfill_days)
+        date_from = today - timedelta(days=initial_backfill_days)
         logger.info(
             "No prior ingestion for %s. Starting backfill from %s",
             metering_point_id,
@@ -46,8 +57,7 @@ def get_timeframe(
             date_from,
         )
 
-    date_to = datetime.now(UTC).date()
-    return date_from, date_to
+    return date_from, today
 
 
 def chunk_date_range(
@@ -65,41 +75,63 @@ def chunk_date_range(
         chunk_days: Size of each chunk in days (default: 90).
 
     Returns:
-        List of (chunk_from, chunk_to) date tuples.
-    """
-    chunks = []
-    current = date_from
+        List of (chunk_from, chunk_to) date tuples. Empty if date_from > date_to.
 
-    while current <= date_to:
-        chunk_end = min(current + timedelta(days=chunk_days - 1), date_to)
-        chunks.append((current, chunk_end))
-        if chunk_end >= date_to:
-            break
-        current = chunk_end + timedelta(days=1)
+    Raises:
+        ValueError: If chunk_days is less than 1.
+    """
+    if chunk_days < 1:
+        raise ValueError("chunk_days must be at least 1")
+
+    # Closed-form chunk count; the list length is known before building it
+    total_days = (date_to - date_from).days + 1
+    n_chunks = max(0, (total_days + chunk_days - 1) // chunk_days)
+    chunks = [
+        (
+            date_from + timedelta(days=i * chunk_days),
+            min(date_from + timedelta(days=(i + 1) * chunk_days - 1), date_to),
+        )
+        for i in range(n_chunks)
+    ]
 
     logger.info("Split date range into %d chunk(s)", len(chunks))
     return chunks
 
 
-def normalize_api_response(api_response: dict, metering_point_ids: dict) -> list[dict]:
-    """
-    Normalize the complex nested Eloverblik API response into flat records.
+def _deep_get(data: dict, *keys: str, default: Any = None) -> Any:
+    """Return ``data[k1][k2]...`` or ``default`` if any level is missing or not a mapping."""
 
-    Extracts hourly consumption readings from the deeply nested API structure
-    and flattens them to one record per reading. Filters to only requested
-    metering points.
+    try:
+        for key in keys:
+            data = data[key]
+    except (KeyError, TypeError):
+        return default
+    return data
+
+
+def _as_id_set(metering_point_ids: Mapping[str, str] | AbstractSet[str]) -> AbstractSet[str]:
+    """Return tracked IDs as a set, reusing a prebuilt set instead of rebuilding it."""
+
+    if isinstance(metering_point_ids, AbstractSet):
+        return metering_point_ids
+    return frozenset(metering_point_ids.values())
+
+
+def _iter_readings(
+    api_response: dict, mp_id_set: AbstractSet[str]
+) -> Iterator[tuple[str, datetime, int, float, str, str]]:
+    """
+    Walk the nested Eloverblik API response and yield one tuple per reading.
 
     Args:
         api_response: The raw response from get_meter_data_with_retry().
-        metering_point_ids: Dictionary of metering_point_id values to track.
+        mp_id_set: Metering point IDs to keep; all other TimeSeries are skipped.
 
-    Returns:
-        List of normalized record dicts with schema:
-        metering_point_id, timestamp, consumption_value, quality, unit,
-        ingestion_timestamp, ingestion_date
+    Yields:
+        Tuples of (metering_point_id, period_start, position, value, quality, unit).
     """
-    normalized_records = []
-    mp_id_set = set(metering_point_ids.values())
+    # Bind hot callables locally to skip global lookups inside the Point loop
+    fromisoformat = datetime.fromisoformat
 
     for result in api_response.get("result", []):
         if not result.get("success"):
@@ -111,27 +143,23 @@ def normalize_api_response(api_response: dict, metering_point_ids: dict) -> list
 
             for time_series in market_doc.get("TimeSeries", []):
                 # Extract metering point ID
-                metering_point_id = (
-                    time_series.get("MarketEvaluationPoint", {}).get("mRID", {}).get("name")
-                )
+                metering_point_id = _deep_get(time_series, "MarketEvaluationPoint", "mRID", "name")
 
                 # Skip if not in our tracked set
                 if metering_point_id not in mp_id_set:
                     continue
 
-                unit = time_series.get("measurement_Unit", {}).get("name", "kWh")
+                unit = _deep_get(time_series, "measurement_Unit", "name", default="kWh")
 
                 # Process each period
                 for period in time_series.get("Period", []):
-                    period_start_str = period.get("timeInterval", {}).get("start")
+                    period_start_str = _deep_get(period, "timeInterval", "start")
                     if not period_start_str:
                         continue
 
-                    # Parse period start timestamp
+                    # Parse period start timestamp (fromisoformat accepts "Z" since 3.11)
                     try:
-                        period_start = datetime.fromisoformat(
-                            period_start_str.replace("Z", "+00:00")
-                        )
+                        period_start = fromisoformat(period_start_str)
                     except ValueError as e:
                         logger.warning("Failed to parse period start timestamp: %s", e)
                         continue
@@ -139,30 +167,127 @@ def normalize_api_response(api_response: dict, metering_point_ids: dict) -> list
                     # Process each point (hourly readings)
                     for point in period.get("Point", []):
                         try:
-                            position = int(point.get("position", 0))
-                            value = float(point.get("out_Quantity.quantity", 0))
-                            quality = point.get("out_Quantity.quality", "")
-
-                            # Calculate timestamp: start + (position - 1) hours
-                            timestamp = period_start + timedelta(hours=position - 1)
-
-                            normalized_records.append(
-                                {
-                                    "metering_point_id": metering_point_id,
-                                    "timestamp": timestamp,
-                                    "consumption_value": value,
-                                    "quality": quality,
-                                    "unit": unit,
-                                    "ingestion_timestamp": datetime.now(UTC),
-                                    "ingestion_date": datetime.now(UTC).date(),
-                                }
-                            )
+                            get = point.get
+                            position = int(get("position", 0))
+                            value = float(get("out_Quantity.quantity", 0))
+                            quality = get("out_Quantity.quality", "")
                         except (ValueError, TypeError) as e:
                             logger.warning("Failed to parse point data: %s", e)
                             continue
+
+                        yield metering_point_id, period_start, position, value, quality, unit
         except Exception as e:
             logger.error("Error processing API result: %s", e)
             continue
 
+
+def normalize_api_response(
+    api_response: dict, metering_point_ids: Mapping[str, str] | AbstractSet[str]
+) -> list[dict]:
+    """
+    Normalize the complex nested Eloverblik API response into flat records.
+
+    Extracts hourly consumption readings from the deeply nested API structure
+    and flattens them to one record per reading. Filters to only requested
+    metering points.
+
+    Args:
+        api_response: The raw response from get_meter_data_with_retry().
+        metering_point_ids: Metering point IDs to track, either as a set (build it
+                            once per run and reuse it) or as a name-to-ID mapping.
+
+    Returns:
+        List of normalized record dicts with schema:
+        metering_point_id, timestamp, consumption_value, quality, unit,
+        ingestion_timestamp, ingestion_date
+    """
+    mp_id_set = _as_id_set(metering_point_ids)
+    # Loop invariants: one ingestion instant per call and a reusable hour step
+    ingestion_timestamp = datetime.now(UTC)
+    ingestion_date = ingestion_timestamp.date()
+    one_hour = timedelta(hours=1)
+
+    normalized_records = [
+        {
+            "metering_point_id": metering_point_id,
+            # Calculate timestamp: start + (position - 1) hours
+            "timestamp": period_start + (position - 1) * one_hour,
+            "consumption_value": value,
+            "quality": quality,
+            "unit": unit,
+            "ingestion_timestamp": ingestion_timestamp,
+            "ingestion_date": ingestion_date,
+        }
+        for metering_point_id, period_start, position, value, quality, unit in _iter_readings(
+            api_response, mp_id_set
+        )
+    ]
+
     logger.info("Normalized %d records from API response", len(normalized_records))
     return normalized_records
+
+
+def normalize_api_response_table(
+    api_response: dict, metering_point_ids: Mapping[str, str] | AbstractSet[str]
+) -> pa.Table:
+    """
+    Normalize the Eloverblik API response into a columnar pyarrow Table.
+
+    Produces the same rows and columns as normalize_api_response(), but
+    collects each field into a flat column and derives timestamps with one
+    vectorized add instead of allocating a dict per reading. The ingestion
+    timestamp is taken once per call and broadcast to every row.
+
+    Args:
+        api_response: The raw response from get_meter_data_with_retry().
+        metering_point_ids: Metering point IDs to track, either as a set (build it
+                            once per run and reuse it) or as a name-to-ID mapping.
+
+    Returns:
+        pyarrow.Table with columns metering_point_id, timestamp,
+        consumption_value, quality, unit, ingestion_timestamp, ingestion_date.
+    """
+    mp_id_set = _as_id_set(metering_point_ids)
+    ingestion_timestamp = datetime.now(UTC)
+
+    ids: list[str] = []
+    starts: list[datetime] = []
+    positions: list[int] = []
+    values: list[float] = []
+    qualities: list[str] = []
+    units: list[str] = []
+    for metering_point_id, period_start, position, value, quality, unit in _iter_readings(
+        api_response, mp_id_set
+    ):
+        ids.append(metering_point_id)
+        starts.append(period_start)
+        positions.append(position)
+        values.append(value)
+        qualities.append(quality)
+        units.append(unit)
+
+    num_rows = len(ids)
+    # Calculate timestamp: start + (position - 1) hours
+    hour_offsets = pc.multiply(pc.subtract(pa.array(positions, pa.int64()), 1), 3600)
+    timestamps = pc.add(
+        pa.array(starts, pa.timestamp("us", tz="UTC")), hour_offsets.cast(pa.duration("s"))
+    )
+
+    table = pa.table(
+        {
+            "metering_point_id": pa.array(ids, pa.string()),
+            "timestamp": timestamps,
+            "consumption_value": pa.array(values, pa.float64()),
+            "quality": pa.array(qualities, pa.string()),
+            "unit": pa.array(units, pa.string()),
+            "ingestion_timestamp": pa.repeat(
+                pa.scalar(ingestion_timestamp, pa.timestamp("us", tz="UTC")), num_rows
+            ),
+            "ingestion_date": pa.repeat(
+                pa.scalar(ingestion_timestamp.date(), pa.date32()), num_rows
+            ),
+        }
+    )
+
+    logger.info("Normalized %d records from API response", num_rows)
+    return table
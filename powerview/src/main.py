@@ -1,6 +1,8 @@
 """Main orchestration module for Eloverblik data extraction pipeline."""
 
 import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import UTC, date, datetime
 
 from powerview.src.api_client import get_meter_data_with_retry
 from powerview.src.auth import get_access_token
@@ -8,12 +10,13 @@ from powerview.src.config import load_config
 from powerview.src.extract import (
     chunk_date_range,
     get_timeframe,
-    normalize_api_response,
+    normalize_api_response_table,
 )
+from powerview.src.ratelimit import RateLimiter
 from powerview.src.storage import (
     init_duckdb_state,
     save_to_parquet,
-    update_last_ingestion_date,
+    update_last_ingestion_dates,
 )
 
 
@@ -22,8 +25,13 @@ def main() -> None:
     Main extraction workflow orchestrating all components.
 
     Coordinates configuration loading, API authentication, data extraction,
-    normalization, and storage. Handles errors gracefully to ensure
-    individual metering point or chunk failures do not stop entire run.
+    normalization, and storage. Metering points that share a date chunk are
+    fetched together in one request, and all chunk requests are dispatched
+    concurrently on a thread pool so total wall-clock time is bound by the
+    slowest requests rather than their sum, while a shared token-bucket
+    limiter keeps the request rate within the API quota. Handles errors
+    gracefully to ensure individual metering point or chunk failures do not
+    stop entire run.
     """
     # Load configuration
     try:
@@ -58,69 +66,102 @@ def main() -> None:
 
     logger.info("Tracking %d metering point(s)", len(config["valid_metering_points"]))
 
-    # Extract data for each metering point
+    # Plan the date chunks for each metering point. Meters whose chunks coincide
+    # (the common case for incremental runs) are batched into a single request.
+    planned: dict[str, tuple[str, date]] = {}
+    chunk_batches: dict[tuple[date, date], list[str]] = {}
+    # Read the clock once so every meter's range ends on the same day
+    today = datetime.now(UTC).date()
     for mp_name, mp_id in config["valid_metering_points"].items():
         logger.info("Processing %s (%s)", mp_name, mp_id)
 
         try:
             # Get timeframe
             date_from, date_to = get_timeframe(
-                mp_id, config["initial_backfill_days"], config["state_db_path"]
+                mp_id, config["initial_backfill_days"], config["state_db_path"], today=today
             )
 
             # Chunk large date ranges
             chunks = chunk_date_range(date_from, date_to, chunk_days=90)
+        except Exception as e:
+            logger.error("Failed to process %s: %s", mp_name, e)
+            continue
+
+        planned[mp_id] = (mp_name, date_to)
+        for chunk in chunks:
+            chunk_batches.setdefault(chunk, []).append(mp_id)
+
+    # Build the tracked-ID set once rather than once per normalized chunk
+    mp_id_set = frozenset(config["valid_metering_points"].values())
+
+    # Track which metering points had at least one successful chunk
+    succeeded: set[str] = set()
+
+    # Fetch all chunks concurrently; requests is network-bound and releases the GIL.
+    # The pool size bounds in-flight requests and the limiter bounds the request rate.
+    rate_limiter = RateLimiter(config["requests_per_second"])
+    with ThreadPoolExecutor(max_workers=config["max_concurrency"]) as executor:
+        futures = {}
+        for (chunk_from, chunk_to), mp_ids in chunk_batches.items():
+            logger.info(
+                "Fetching data for %d metering point(s) from %s to %s",
+                len(mp_ids),
+                chunk_from,
+                chunk_to,
+            )
+            future = executor.submit(
+                get_meter_data_with_retry,
+                access_token,
+                chunk_from.isoformat(),
+                chunk_to.isoformat(),
+                metering_point_ids=mp_ids,
+                rate_limiter=rate_limiter,
+            )
+            futures[future] = (mp_ids, chunk_from, chunk_to)
+
+        # Normalize and store each chunk as soon as its response arrives
+        for future in as_completed(futures):
+            mp_ids, chunk_from, chunk_to = futures[future]
+            try:
+                api_response = future.result()
+
+                records = normalize_api_response_table(api_response, mp_id_set)
 
-            # Track if any chunk succeeded for this metering point
-            chunk_success = False
-
-            # Extract data for each chunk
-            for chunk_from, chunk_to in chunks:
-                logger.info("Fetching data from %s to %s", chunk_from, chunk_to)
-
-                try:
-                    # Fetch from API
-                    api_response = get_meter_data_with_retry(
-                        access_token,
-                        chunk_from.isoformat(),
-                        chunk_to.isoformat(),
-                        metering_point_ids=[mp_id],
-                    )
-
-                    # Normalize
-
-                    records = normalize_api_response(api_response, config["valid_metering_points"])
-
-                    # Save to Parquet
-                    save_to_parquet(records, config["data_storage_path"])
-
-                    # Mark this metering point as having successful chunk
-                    chunk_success = True
-
-                except Exception as e:
-                    logger.error(
-                        "Failed to fetch/process data for chunk %s to %s: %s",
-                        chunk_from,
-                        chunk_to,
-                        e,
-                    )
-                    continue
-
-            # Only update state if at least one chunk succeeded for this metering point
-            if chunk_success:
-                update_last_ingestion_date(mp_id, date_to, config["state_db_path"])
-                logger.info("Completed processing for %s", mp_name)
-            else:
-                logger.warning(
-                    "No chunks succeeded for %s (%s). State not updated. "
-                    "Will retry from same date range on next run.",
-                    mp_name,
-                    mp_id,
+                save_to_parquet(records, config["data_storage_path"])
+
+                succeeded.update(mp_ids)
+
+            except Exception as e:
+                logger.error(
+                    "Failed to fetch/process data for %s chunk %s to %s: %s",
+                    ", ".join(mp_ids),
+                    chunk_from,
+                    chunk_to,
+                    e,
                 )
+                continue
+
+    # Only update state for metering points where at least one chunk succeeded
+    state_updates: list[tuple[str, date]] = []
+    for mp_id, (mp_name, date_to) in planned.items():
+        if mp_id not in succeeded:
+            logger.warning(
+                "No chunks succeeded for %s (%s). State not updated. "
+                "Will retry from same date range on next run.",
+                mp_name,
+                mp_id,
+            )
+            continue
+        state_updates.append((mp_id, date_to))
 
+    # Persist all state changes in a single DuckDB transaction
+    if state_updates:
+        try:
+            update_last_ingestion_dates(state_updates, config["state_db_path"])
+            for mp_id, _ in state_updates:
+                logger.info("Completed processing for %s", planned[mp_id][0])
         except Exception as e:
-            logger.error("Failed to process %s: %s", mp_name, e)
-            continue
+            logger.error("Failed to update ingestion state: %s", e)
 
     logger.info("Extraction workflow completed")
 
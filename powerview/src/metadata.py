@@ -2,59 +2,84 @@
 
 from __future__ import annotations
 
-import json
 import logging
 from typing import Any
 
-import pandas as pd
+import orjson
+import pyarrow as pa
 
 import duckdb
 
 logger = logging.getLogger(__name__)
 
-_CORE_METADATA_FIELDS = {"id", "name", "type", "location", "description"}
+_CORE_METADATA_FIELDS = frozenset({"id", "name", "type", "location", "description"})
+
+# Arrow tables are immutable, so one empty instance can be shared by every caller
+_EMPTY_METADATA_TABLE = pa.table(
+    {
+        column: pa.array([], pa.string())
+        for column in (
+            "metering_point_id",
+            "name",
+            "type",
+            "location",
+            "description",
+            "extra_metadata",
+        )
+    }
+)
+
+
+def _as_text(value: Any) -> str | None:
+    """Return ``value`` as a string, keeping missing values as None."""
 
+    return None if value is None else str(value)
 
-def build_metadata_frame(metering_points: dict[str, dict[str, Any]]) -> pd.DataFrame:
-    """Convert metering-point metadata into a normalized pandas DataFrame.
+
+def build_metadata_frame(metering_points: dict[str, dict[str, Any]]) -> pa.Table:
+    """Convert metering-point metadata into a normalized Arrow table.
 
     Args:
         metering_points: Mapping of metering point IDs to metadata dictionaries.
 
     Returns:
-        pandas.DataFrame: Normalized metadata ready for DuckDB ingestion.
+        pyarrow.Table: Normalized metadata with string columns, ready for DuckDB ingestion.
     """
 
-    records: list[dict[str, Any]] = []
+    if not metering_points:
+        return _EMPTY_METADATA_TABLE
+
+    # Accumulate one list per column so each Arrow array is built in one pass
+    ids: list[str] = []
+    names: list[str | None] = []
+    types: list[str | None] = []
+    locations: list[str | None] = []
+    descriptions: list[str | None] = []
+    extra_metadata: list[str | None] = []
     for meter_id, metadata in sorted(metering_points.items()):
         normalized = metadata or {}
         extras = {
             key: value for key, value in normalized.items() if key not in _CORE_METADATA_FIELDS
         }
-        records.append(
-            {
-                "metering_point_id": meter_id,
-                "name": normalized.get("name", meter_id),
-                "type": normalized.get("type"),
-                "location": normalized.get("location"),
-                "description": normalized.get("description"),
-                "extra_metadata": json.dumps(extras, ensure_ascii=True) if extras else None,
-            }
+        ids.append(meter_id)
+        names.append(_as_text(normalized.get("name", meter_id)))
+        types.append(_as_text(normalized.get("type")))
+        locations.append(_as_text(normalized.get("location")))
+        descriptions.append(_as_text(normalized.get("description")))
+        extra_metadata.append(
+            orjson.dumps(extras, option=orjson.OPT_NON_STR_KEYS).decode() if extras else None
         )
 
-    if not records:
-        return pd.DataFrame(
-            columns=[
-                "metering_point_id",
-                "name",
-                "type",
-                "location",
-                "description",
-                "extra_metadata",
-            ]
-        )
-
-    return pd.DataFrame.from_records(records)
+    return pa.table(
+        {
+            "metering_point_id": pa.array(ids, pa.string()),
+            "name": pa.array(names, pa.string()),
+            "type": pa.array(types, pa.string()),
+            "location": pa.array(locations, pa.string()),
+            "description": pa.array(descriptions, pa.string()),
+            "extra_metadata": pa.array(extra_metadata, pa.string()),
+        }
+    )
 
 
 def load_metadata_table(
@@ -70,10 +95,10 @@ def load_metadata_table(
         table_name: Fully qualified table name to create/replace.
     """
 
-    metadata_frame = build_metadata_frame(metering_points)
+    metadata_table = build_metadata_frame(metering_points)
     connection.execute("CREATE SCHEMA IF NOT EXISTS reporting")
 
-    connection.register("meter_metadata_df", metadata_frame)
+    connection.register("meter_metadata_df", metadata_table)
     try:
         connection.execute(
             f"""
@@ -86,6 +111,6 @@ def load_metadata_table(
 
     logger.info(
         "Loaded %d metering-point metadata row(s) into %s",
-        len(metadata_frame.index),
+        metadata_table.num_rows,
         table_name,
     )
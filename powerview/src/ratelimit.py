@@ -0,0 +1,57 @@
+"""Rate limiting utilities for Eloverblik API requests."""
+
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class RateLimiter:
+    """
+    Thread-safe token bucket that caps the request rate to the Eloverblik API.
+
+    Tokens refill continuously at ``rate`` per second up to ``burst``. Each
+    request consumes one token; callers block until a token is available so
+    concurrent workers stay under the API quota instead of tripping HTTP 429.
+    """
+
+    def __init__(self, rate: float, burst: int = 10) -> None:
+        """
+        Initialize the limiter with a full bucket.
+
+        Args:
+            rate: Sustained number of requests allowed per second.
+            burst: Maximum number of tokens that can accumulate (default: 10).
+
+        Raises:
+            ValueError: If rate or burst is not positive.
+        """
+        if rate <= 0:
+            raise ValueError("Rate must be positive")
+        if burst < 1:
+            raise ValueError("Burst must be at least 1")
+
+        self.rate = rate
+        self.max_tokens = float(burst)
+        self.tokens = float(burst)
+        self.updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def wait_for_token(self) -> None:
+        """Block until a token is available, then consume it."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                elapsed = now - self.updated_at
+                self.tokens = min(self.max_tokens, self.tokens + elapsed * self.rate)
+                self.updated_at = now
+
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+
+                wait_time = (1 - self.tokens) / self.rate
+
+            logger.debug("Rate limit reached. Waiting %.3fs for a token", wait_time)
+            time.sleep(wait_time)
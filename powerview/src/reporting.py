@@ -13,61 +13,81 @@ from powerview.src.metadata import load_metadata_table
 logger = logging.getLogger(__name__)
 
 
-def _escape_literal(value: str) -> str:
-    """Escape single quotes for safe SQL embedding."""
+def _parquet_glob(base_path: Path) -> str:
+    """Return the parquet glob string for the partitioned dataset."""
 
-    return value.replace("'", "''")
+    pattern = base_path / "metering_point=*/date=*/consumption_data.parquet"
+    return pattern.as_posix()
 
 
-def _parquet_glob(base_path: Path) -> tuple[str, list[Path]]:
-    """Return the parquet glob string and the files that match it."""
+def _count_parquet_files(connection: duckdb.DuckDBPyConnection, parquet_glob: str) -> int:
+    """Count files matching ``parquet_glob`` using DuckDB's native glob.
 
-    pattern = base_path / "metering_point=*/date=*/consumption_data.parquet"
-    files = sorted(base_path.glob("metering_point=*/date=*/consumption_data.parquet"))
-    if not files:
+    Raises:
+        FileNotFoundError: If no Parquet files match the pattern.
+    """
+
+    file_count = connection.execute("SELECT COUNT(*) FROM glob(?)", [parquet_glob]).fetchone()[0]
+    if not file_count:
         raise FileNotFoundError(
-            f"No Parquet files found under {base_path}. Run the extraction pipeline first."
+            f"No Parquet files found under {parquet_glob}. Run the extraction pipeline first."
         )
-    return pattern.as_posix(), files
+    return file_count
+
+
+def _drop_legacy_stage_view(connection: duckdb.DuckDBPyConnection) -> None:
+    """Drop ``meter_data_stage`` if an older build created it as a view.
+
+    DuckDB refuses to replace a view with a table of the same name.
+    """
+
+    is_view = connection.execute(
+        """
+        SELECT 1 FROM duckdb_views()
+        WHERE schema_name = 'reporting' AND view_name = 'meter_data_stage'
+        """
+    ).fetchone()
+    if is_view:
+        connection.execute("DROP VIEW reporting.meter_data_stage")
+
+
+# Materialized once per refresh so the Parquet files are decoded a single time;
+# the glob is bound as a parameter and every downstream view reads this table.
+_STAGE_TABLE = """
+CREATE OR REPLACE TABLE reporting.meter_data_stage AS
+WITH source AS (
+    SELECT
+        metering_point_id,
+        timezone('UTC', timestamp) AS reading_ts_utc,
+        consumption_value,
+        quality,
+        unit,
+        ingestion_timestamp,
+        ingestion_date
+    FROM read_parquet(?)
+)
+SELECT
+    metering_point_id,
+    reading_ts_utc,
+    DATE(reading_ts_utc) AS reading_date,
+    EXTRACT('hour' FROM reading_ts_utc) AS reading_hour,
+    EXTRACT('isodow' FROM reading_ts_utc) AS reading_weekday,
+    strftime(reading_ts_utc, '%A') AS reading_weekday_label,
+    EXTRACT('month' FROM reading_ts_utc) AS reading_month,
+    EXTRACT('year' FROM reading_ts_utc) AS reading_year,
+    consumption_value,
+    quality,
+    unit,
+    ingestion_timestamp,
+    ingestion_date
+FROM source;
+"""
 
 
-def _view_statements(parquet_glob: str) -> list[tuple[str, str]]:
-    """Assemble SQL statements required for the reporting layer."""
+def _view_statements() -> list[tuple[str, str]]:
+    """Assemble the view statements layered on top of the stage table."""
 
-    escaped_glob = _escape_literal(parquet_glob)
     statements = [
-        (
-            "reporting.meter_data_stage",
-            f"""
-            CREATE OR REPLACE VIEW reporting.meter_data_stage AS
-            WITH source AS (
-                SELECT
-                    metering_point_id,
-                    timezone('UTC', timestamp) AS reading_ts_utc,
-                    consumption_value,
-                    quality,
-                    unit,
-                    ingestion_timestamp,
-                    ingestion_date
-                FROM read_parquet('{escaped_glob}')
-            )
-            SELECT
-                metering_point_id,
-                reading_ts_utc,
-                DATE(reading_ts_utc) AS reading_date,
-                EXTRACT('hour' FROM reading_ts_utc) AS reading_hour,
-                EXTRACT('isodow' FROM reading_ts_utc) AS reading_weekday,
-                strftime(reading_ts_utc, '%A') AS reading_weekday_label,
-                EXTRACT('month' FROM reading_ts_utc) AS reading_month,
-                EXTRACT('year' FROM reading_ts_utc) AS reading_year,
-                consumption_value,
-                quality,
-                unit,
-                ingestion_timestamp,
-                ingestion_date
-            FROM source;
-            """,
-        ),
         (
             "reporting.meter_data_clean",
             """
@@ -239,42 +259,66 @@ def build_reporting_layer(
     data_path: str | Path | None = None,
     analytics_db_path: str | Path | None = None,
     metering_points_override: dict[str, dict[str, Any]] | None = None,
-) -> Path:
+    connection: duckdb.DuckDBPyConnection | None = None,
+) -> Path | None:
     """Build or refresh the DuckDB reporting layer defined in the plan.
 
     Args:
         data_path: Optional override for the Parquet data root.
         analytics_db_path: Optional override for the DuckDB database location.
         metering_points_override: Optional metadata mapping to bypass config loading.
+        connection: Optional open DuckDB connection to build into instead of
+            opening the analytics database file. It is left open for the caller.
+
+    Configuration is only loaded when at least one of the overrides is missing.
 
     Returns:
-        Path: Location of the analytics DuckDB file.
+        Path | None: Location of the analytics DuckDB file, or None when
+        building into a caller-supplied connection.
     """
 
-    config = load_config()
+    if data_path and (analytics_db_path or connection) and metering_points_override:
+        config: dict[str, Any] = {}
+    else:
+        config = load_config()
     resolved_data_path = Path(data_path or config["data_storage_path"]).resolve()
-    resolved_analytics_path = Path(analytics_db_path or config["analytics_db_path"]).resolve()
     metadata = metering_points_override or config["metering_points"]
 
     if not resolved_data_path.exists():
         raise FileNotFoundError(f"Data path does not exist: {resolved_data_path}")
 
-    resolved_analytics_path.parent.mkdir(parents=True, exist_ok=True)
-    parquet_glob, files = _parquet_glob(resolved_data_path)
-    logger.info("Found %d parquet partition(s) for reporting", len(files))
+    parquet_glob = _parquet_glob(resolved_data_path)
 
-    connection = duckdb.connect(resolved_analytics_path.as_posix())
+    owns_connection = connection is None
+    resolved_analytics_path: Path | None = None
+    if owns_connection:
+        resolved_analytics_path = Path(analytics_db_path or config["analytics_db_path"]).resolve()
+        resolved_analytics_path.parent.mkdir(parents=True, exist_ok=True)
+        connection = duckdb.connect(resolved_analytics_path.as_posix())
     try:
-        connection.execute("CREATE SCHEMA IF NOT EXISTS reporting")
-        for view_name, statement in _view_statements(parquet_glob):
-            connection.execute(statement)
-            logger.info("Created or replaced view %s", view_name)
+        file_count = _count_parquet_files(connection, parquet_glob)
+        logger.info("Found %d parquet partition(s) for reporting", file_count)
 
+        # Creates the reporting schema and the metadata table the enriched view joins
         load_metadata_table(connection, metadata)
-        connection.execute(_METADATA_ENRICHED_VIEW)
+        _drop_legacy_stage_view(connection)
+
+        connection.execute(_STAGE_TABLE, [parquet_glob])
+        logger.info("Created or replaced table reporting.meter_data_stage")
+
+        # Submit every view as one script so DuckDB parses the batch in a single call
+        statements = _view_statements()
+        script = "\n".join([statement for _, statement in statements] + [_METADATA_ENRICHED_VIEW])
+        connection.execute(script)
+        for view_name, _ in statements:
+            logger.info("Created or replaced view %s", view_name)
         logger.info("Created metadata-enriched daily view")
     finally:
-        connection.close()
+        if owns_connection:
+            connection.close()
 
-    logger.info("Reporting layer refreshed at %s", resolved_analytics_path)
+    if resolved_analytics_path is None:
+        logger.info("Reporting layer refreshed on the supplied connection")
+    else:
+        logger.info("Reporting layer refreshed at %s", resolved_analytics_path)
     return resolved_analytics_path
@@ -1,18 +1,86 @@
 """Storage module for DuckDB state management and Parquet file I/O."""
 
+import atexit
 import logging
+import random
+import time
 from datetime import date
 from pathlib import Path
 
-import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
 
 import duckdb
 
 logger = logging.getLogger(__name__)
 
+# zstd yields roughly half the file size of snappy at similar decode cost
+PARQUET_COMPRESSION = "zstd"
+
+# Fixed layout of every consumption Parquet file, so writes never depend on type inference
+CONSUMPTION_SCHEMA = pa.schema(
+    [
+        ("metering_point_id", pa.string()),
+        ("timestamp", pa.timestamp("us", tz="UTC")),
+        ("consumption_value", pa.float64()),
+        ("quality", pa.string()),
+        ("unit", pa.string()),
+        ("ingestion_timestamp", pa.timestamp("us", tz="UTC")),
+        ("ingestion_date", pa.date32()),
+    ]
+)
+
 
 # DuckDB State Management Functions
 
+# State writes usually fail on short-lived file locks, so retries back off in milliseconds
+STATE_RETRY_BASE_DELAY = 0.05
+STATE_RETRY_MAX_DELAY = 1.0
+STATE_RETRY_JITTER = 0.5
+_random = random.SystemRandom()
+
+# Open state connections keyed on database path, reused across helper calls
+_connections: dict[str, duckdb.DuckDBPyConnection] = {}
+
+
+def _get_con(db_path: str) -> duckdb.DuckDBPyConnection:
+    """Return the cached DuckDB connection for ``db_path``, opening it if needed."""
+
+    con = _connections.get(db_path)
+    if con is None:
+        con = duckdb.connect(db_path)
+        _connections[db_path] = con
+    return con
+
+
+def _drop_con(db_path: str) -> None:
+    """Close and forget the cached connection for ``db_path`` so the next call reconnects."""
+
+    con = _connections.pop(db_path, None)
+    if con is not None:
+        try:
+            con.close()
+        except Exception as e:
+            logger.debug("Ignoring error while closing DuckDB connection: %s", e)
+
+
+def close_connections() -> None:
+    """Close every cached DuckDB state connection."""
+
+    for db_path in list(_connections):
+        _drop_con(db_path)
+
+
+atexit.register(close_connections)
+
+
+def _state_retry_delay(attempt: int, base_delay: float) -> float:
+    """Return seconds to wait before state-write retry ``attempt`` (1-based)."""
+
+    backoff = min(STATE_RETRY_MAX_DELAY, base_delay * (2 ** (attempt - 1)))
+    return backoff * (1 + _random.uniform(0, STATE_RETRY_JITTER))
+
 
 def init_duckdb_state(db_path: str = "./state.duckdb") -> None:
     """
@@ -28,7 +96,7 @@ def init_duckdb_state(db_path: str = "./state.duckdb") -> None:
         Exception: If database initialization fails.
     """
     try:
-        con = duckdb.connect(db_path)
+        con = _get_con(db_path)
         con.execute(
             """
             CREATE TABLE IF NOT EXISTS ingestion_state (
@@ -37,9 +105,9 @@ def init_duckdb_state(db_path: str = "./state.duckdb") -> None:
             )
         """
         )
-        con.close()
         logger.info("Initialized DuckDB state at %s", db_path)
     except Exception as e:
+        _drop_con(db_path)
         logger.error("Failed to initialize DuckDB state: %s", e)
         raise
 
@@ -59,42 +127,48 @@ def get_last_ingestion_date(metering_point_id: str, db_path: str = "./state.duck
         The last ingestion date as a date object, or None if no prior ingestion.
     """
     try:
-        con = duckdb.connect(db_path)
+        con = _get_con(db_path)
         result = con.execute(
             "SELECT last_ingestion_date FROM ingestion_state WHERE metering_point_id = ?",
             [metering_point_id],
         ).fetchone()
-        con.close()
 
         if result and result[0]:
             return result[0]
         return None
     except Exception as e:
+        _drop_con(db_path)
         logger.warning("Failed to query last ingestion date for %s: %s", metering_point_id, e)
         return None
 
 
 def update_last_ingestion_date(
-    metering_point_id: str, date_to: date, db_path: str = "./state.duckdb"
+    metering_point_id: str,
+    date_to: date,
+    db_path: str = "./state.duckdb",
+    max_retries: int = 3,
+    base_delay: float = STATE_RETRY_BASE_DELAY,
 ) -> None:
     """
     Update the last ingestion date for a metering point in DuckDB.
 
-    Uses upsert (insert or replace) logic. Retries up to 3 times on failure.
+    Uses upsert (insert or replace) logic. Failed attempts are retried with
+    jittered exponential backoff.
 
     Args:
         metering_point_id: The metering point ID to update.
         date_to: The new last ingestion date.
         db_path: Path to the DuckDB database file.
+        max_retries: Maximum number of attempts. Defaults to 3.
+        base_delay: Seconds to wait before the first retry; doubles per retry.
 
     Raises:
-        Exception: If update fails after 3 retries.
+        Exception: If update fails after max_retries attempts.
     """
     retries = 0
-    max_retries = 3
     while retries < max_retries:
         try:
-            con = duckdb.connect(db_path)
+            con = _get_con(db_path)
             con.execute(
                 """
                 INSERT INTO ingestion_state (metering_point_id, last_ingestion_date)
@@ -104,10 +178,81 @@ def update_last_ingestion_date(
                 """,
                 [metering_point_id, date_to],
             )
-            con.close()
             logger.info("Updated last ingestion date for %s to %s", metering_point_id, date_to)
             return
         except Exception as e:
+            _drop_con(db_path)
+            retries += 1
+            if retries >= max_retries:
+                logger.error(
+                    "Failed to update last ingestion date after %d retries: %s",
+                    max_retries,
+                    e,
+                )
+                raise
+            wait_time = _state_retry_delay(retries, base_delay)
+            logger.warning(
+                "DuckDB update failed. Waiting %.2fs before retry %d/%d",
+                wait_time,
+                retries,
+                max_retries,
+            )
+            time.sleep(wait_time)
+
+
+def update_last_ingestion_dates(
+    updates: list[tuple[str, date]],
+    db_path: str = "./state.duckdb",
+    max_retries: int = 3,
+    base_delay: float = STATE_RETRY_BASE_DELAY,
+) -> None:
+    """
+    Update the last ingestion dates for several metering points in one statement.
+
+    The pairs are registered as an Arrow table and upserted with a single
+    INSERT ... ON CONFLICT, so either all metering points advance or none do.
+    Failed attempts are retried with jittered exponential backoff.
+
+    Args:
+        updates: Pairs of (metering point ID, new last ingestion date).
+        db_path: Path to the DuckDB database file.
+        max_retries: Maximum number of attempts. Defaults to 3.
+        base_delay: Seconds to wait before the first retry; doubles per retry.
+
+    Raises:
+        Exception: If update fails after max_retries attempts.
+    """
+    if not updates:
+        return
+
+    retries = 0
+    while retries < max_retries:
+        try:
+            con = _get_con(db_path)
+            # A registered Arrow table lets DuckDB upsert the batch in one statement
+            batch = pa.table(
+                {
+                    "metering_point_id": pa.array([mp_id for mp_id, _ in updates], pa.string()),
+                    "last_ingestion_date": pa.array([d for _, d in updates], pa.date32()),
+                }
+            )
+            con.register("ingestion_state_updates", batch)
+            try:
+                con.execute(
+                    """
+                    INSERT INTO ingestion_state (metering_point_id, last_ingestion_date)
+                    SELECT metering_point_id, last_ingestion_date FROM ingestion_state_updates
+                    ON CONFLICT(metering_point_id) DO
+                    UPDATE SET last_ingestion_date=excluded.last_ingestion_date
+                    """
+                )
+            finally:
+                con.unregister("ingestion_state_updates")
+            for metering_point_id, date_to in updates:
+                logger.info("Updated last ingestion date for %s to %s", metering_point_id, date_to)
+            return
+        except Exception as e:
+            _drop_con(db_path)
             retries += 1
             if retries >= max_retries:
                 logger.error(
@@ -116,13 +261,20 @@ def update_last_ingestion_date(
                     e,
                 )
                 raise
-            logger.warning("DuckDB update failed, retry %d/%d", retries, max_retries)
+            wait_time = _state_retry_delay(retries, base_delay)
+            logger.warning(
+                "DuckDB update failed. Waiting %.2fs before retry %d/%d",
+                wait_time,
+                retries,
+                max_retries,
+            )
+            time.sleep(wait_time)
 
 
 # Parquet File I/O Functions
 
 
-def save_to_parquet(records: list[dict], base_path: str | None = None) -> None:
+def save_to_parquet(records: list[dict] | pa.Table, base_path: str | None = None) -> None:
     """
     Save normalized records to partitioned Parquet files.
 
@@ -134,7 +286,8 @@ def save_to_parquet(records: list[dict], base_path: str | None = None) -> None:
     where date is the consumption date extracted from the timestamp.
 
     Args:
-        records: List of normalized record dicts.
+        records: Normalized records, either as a list of record dicts or as a
+                 pyarrow Table from normalize_api_response_table().
         base_path: Base directory for storing Parquet files. If None, uses
                    `data_storage_path` from config. Defaults to None.
 
@@ -148,46 +301,68 @@ def save_to_parquet(records: list[dict], base_path: str | None = None) -> None:
         config = load_config()
         base_path = config["data_storage_path"]
 
-    if not records:
+    if len(records) == 0:
         logger.info("No records to save")
         return
 
-    df = pd.DataFrame(records)
-
-    # Extract consumption date from timestamp for partitioning
-    df["consumption_date"] = df["timestamp"].dt.date
-
-    # Group by metering point and consumption date
-    for (mp_id, consumption_date), group_df in df.groupby(
-        ["metering_point_id", "consumption_date"]
+    # Record dicts are converted straight to Arrow columns, skipping pandas entirely
+    if isinstance(records, pa.Table):
+        table = records.select(CONSUMPTION_SCHEMA.names)
+        if not table.schema.equals(CONSUMPTION_SCHEMA):
+            table = table.cast(CONSUMPTION_SCHEMA)
+    else:
+        table = pa.Table.from_pylist(records, schema=CONSUMPTION_SCHEMA)
+
+    # Sort once so every (metering point, consumption date) partition is a contiguous slice
+    table = table.sort_by([("metering_point_id", "ascending"), ("timestamp", "ascending")])
+    consumption_dates = pc.cast(table["timestamp"], pa.date32())
+    partitions = (
+        pa.table({"metering_point_id": table["metering_point_id"], "date": consumption_dates})
+        .group_by(["metering_point_id", "date"], use_threads=False)
+        .aggregate([("date", "count")])
+    )
+
+    # Create each meter directory once; the per-partition loop then only adds the leaf
+    meter_paths = {
+        mp_id: Path(base_path) / f"metering_point={mp_id}"
+        for mp_id in pc.unique(partitions["metering_point_id"]).to_pylist()
+    }
+    for meter_path in meter_paths.values():
+        meter_path.mkdir(parents=True, exist_ok=True)
+
+    offset = 0
+    for mp_id, consumption_date, length in zip(
+        partitions["metering_point_id"].to_pylist(),
+        partitions["date"].to_pylist(),
+        partitions["date_count"].to_pylist(),
+        strict=True,
     ):
+        group = table.slice(offset, length)
+        offset += length
         try:
             # Create partitioned directory structure
-            partition_path = (
-                Path(base_path) / f"metering_point={mp_id}" / f"date={consumption_date}"
-            )
-            partition_path.mkdir(parents=True, exist_ok=True)
+            partition_path = meter_paths[mp_id] / f"date={consumption_date}"
+            partition_path.mkdir(exist_ok=True)
 
             file_path = partition_path / "consumption_data.parquet"
 
+            combined = group
             # Upsert logic: check if file exists
             if file_path.exists():
-                # Load existing data
-                existing_df = pd.read_parquet(file_path)
-                # Remove rows with timestamps that overlap with new data
-                existing_df = existing_df[~existing_df["timestamp"].isin(group_df["timestamp"])]
-                # Combine old (without duplicates) + new data and sort
-                combined_df = pd.concat([existing_df, group_df], ignore_index=True)
-                combined_df = combined_df.sort_values("timestamp")
-            else:
-                combined_df = group_df.sort_values("timestamp")
-
-            # Drop the temporary consumption_date column before saving
-            combined_df = combined_df.drop(columns=["consumption_date"])
-
-            combined_df.to_parquet(file_path, engine="pyarrow", compression="snappy", index=False)
-
-            logger.info("Wrote %d records to %s", len(combined_df), file_path)
+                # Read only the timestamps first to find existing rows not replaced by this batch
+                existing_ts = pq.read_table(file_path, columns=["timestamp"])["timestamp"]
+                existing_ts = existing_ts.cast(group.schema.field("timestamp").type)
+                keep = pc.invert(pc.is_in(existing_ts, value_set=group["timestamp"]))
+                # Only load the full file when some existing rows survive the upsert
+                if pc.any(keep).as_py():
+                    existing = pq.read_table(file_path).select(group.column_names)
+                    existing = existing.cast(group.schema).filter(keep)
+                    # Combine old (without duplicates) + new data and sort
+                    combined = pa.concat_tables([existing, group]).sort_by("timestamp")
+
+            pq.write_table(combined, file_path, compression=PARQUET_COMPRESSION)
+
+            logger.info("Wrote %d records to %s", combined.num_rows, file_path)
         except Exception as e:
             logger.error("Failed to write Parquet file for %s/%s: %s", mp_id, consumption_date, e)
             raise
@@ -0,0 +1,19 @@
+"""Assertion helpers shared across the test modules."""
+
+import pyarrow as pa
+
+
+def assert_batch_equals(records: list[dict] | pa.Table, expected: list[dict]) -> None:
+    """Assert that the columns named in ``expected`` match ``records`` row for row.
+
+    ``records`` may be a list of record dicts or a pyarrow Table, so tests keep
+    passing whichever shape the normalizer returns. Columns not mentioned in
+    ``expected`` are ignored.
+    """
+
+    actual = records if isinstance(records, pa.Table) else pa.Table.from_pylist(list(records))
+    expected_table = pa.Table.from_pylist(expected)
+    actual = actual.select(expected_table.column_names)
+    expected_table = expected_table.cast(actual.schema)
+
+    assert actual.equals(expected_table), f"{actual.to_pylist()} != {expected_table.to_pylist()}"
@@ -0,0 +1,14 @@
+"""Shared pytest fixtures for the powerview test suite."""
+
+import pytest
+
+import duckdb
+
+
+@pytest.fixture(scope="session")
+def duckdb_conn():
+    """Return one in-memory DuckDB connection shared across the test session."""
+
+    connection = duckdb.connect(":memory:")
+    yield connection
+    connection.close()
@@ -1,32 +1,62 @@
 """Unit tests for the api_client module."""
 
+import json
+import logging
+import os
+import time
+from types import SimpleNamespace
 from unittest.mock import MagicMock, patch
 
+import orjson
 import pytest
 import requests
 
 from powerview.src.api_client import (
+    NonRetryableError,
     get_meter_data,
     get_meter_data_with_retry,
     get_metering_points,
+    get_session,
+    metering_points_cache_path,
 )
 
 
+class TestGetSession:
+    """Tests for the shared HTTP session."""
+
+    def test_get_session_returns_shared_instance(self):
+        """Test that every call returns the same pooled session."""
+        assert get_session() is get_session()
+        assert isinstance(get_session(), requests.Session)
+
+    def test_get_metering_points_uses_explicit_session(self):
+        """Test that a caller-supplied session takes precedence over the shared one."""
+        mock_session = MagicMock()
+        mock_session.get.return_value.content = orjson.dumps({"result": []})
+
+        result = get_metering_points("test_token", session=mock_session)
+
+        assert result == {"result": []}
+        mock_session.get.assert_called_once()
+
+
 class TestGetMeteringPoints:
     """Tests for get_metering_points function."""
 
-    @patch("powerview.src.api_client.requests.get")
+    @patch("powerview.src.api_client._SESSION.get")
     def test_get_metering_points_success(self, mock_get):
         """Test successful metering points retrieval."""
         mock_response = MagicMock()
-        mock_response.json.return_value = {
-            "result": [
-                {
-                    "meteringPointId": "123456789012345678",
-                    "consumerName": "Test User",
-                }
-            ]
-        }
+        mock_response.content = orjson.dumps(
+            {
+                "result": [
+                    {
+                        "meteringPointId": "123456789012345678",
+                        "consumerName": "Test User",
+                    }
+                ]
+            }
+        )
         mock_get.return_value = mock_response
 
         result = get_metering_points("test_token")
@@ -40,7 +70,7 @@ class TestGetMeteringPoints:
             == "https://api.eloverblik.dk/CustomerApi/api/meteringpoints/meteringpoints"
         )
 
-    @patch("powerview.src.api_client.requests.get")
+    @patch("powerview.src.api_client._SESSION.get")
     def test_get_metering_points_http_error(self, mock_get):
         """Test metering points retrieval with HTTP error."""
         mock_response = MagicMock()
@@ -50,42 +80,74 @@ class TestGetMeteringPoints:
         with pytest.raises(requests.HTTPError):
             get_metering_points("invalid_token")
 
+    @patch("powerview.src.api_client._SESSION.get")
+    def test_get_metering_points_writes_and_reuses_cache(self, mock_get, tmp_path):
+        """Test that a fresh cache file short-circuits the API call."""
+        mock_get.return_value.content = orjson.dumps({"result": [{"meteringPointId": "1"}]})
+        cache_path = metering_points_cache_path(tmp_path)
+
+        first = get_metering_points("test_token", cache_path=cache_path)
+        second = get_metering_points("test_token", cache_path=cache_path)
+
+        assert first == second == {"result": [{"meteringPointId": "1"}]}
+        assert json.loads(cache_path.read_text(encoding="utf-8")) == first
+        mock_get.assert_called_once()
+
+    @patch("powerview.src.api_client._SESSION.get")
+    def test_get_metering_points_refreshes_expired_cache(self, mock_get, tmp_path):
+        """Test that a cache file older than the TTL is ignored."""
+        cache_path = metering_points_cache_path(tmp_path)
+        cache_path.parent.mkdir(parents=True)
+        cache_path.write_text(json.dumps({"result": ["stale"]}), encoding="utf-8")
+        stale_time = time.time() - 2 * 24 * 60 * 60
+        os.utime(cache_path, (stale_time, stale_time))
+        mock_get.return_value.content = orjson.dumps({"result": ["fresh"]})
+
+        result = get_metering_points("test_token", cache_path=cache_path)
+
+        assert result == {"result": ["fresh"]}
+        mock_get.assert_called_once()
+
 
 class TestGetMeterData:
     """Tests for get_meter_data function."""
 
-    @patch("powerview.src.api_client.requests.post")
+    @patch("powerview.src.api_client._SESSION.post")
     def test_get_meter_data_success(self, mock_post):
         """Test successful meter data retrieval."""
         mock_response = MagicMock()
-        mock_response.json.return_value = {
-            "result": [
-                {
-                    "success": True,
-                    "MyEnergyData_MarketDocument": {
-                        "TimeSeries": [
-                            {
-                                "MarketEvaluationPoint": {"mRID": {"name": "123456789012345678"}},
-                                "Period": [
-                                    {
-                                        "timeInterval": {"start": "2025-01-01T00:00:00Z"},
-                                        "Point": [
-                                            {
-                                                "position": "1",
-                                                "out_Quantity": {
-                                                    "quantity": "1.5",
-                                                    "quality": "A01",
-                                                },
-                                            }
-                                        ],
-                                    }
-                                ],
-                            }
-                        ]
-                    },
-                }
-            ]
-        }
+        mock_response.content = orjson.dumps(
+            {
+                "result": [
+                    {
+                        "success": True,
+                        "MyEnergyData_MarketDocument": {
+                            "TimeSeries": [
+                                {
+                                    "MarketEvaluationPoint": {
+                                        "mRID": {"name": "123456789012345678"}
+                                    },
+                                    "Period": [
+                                        {
+                                            "timeInterval": {"start": "2025-01-01T00:00:00Z"},
+                                            "Point": [
+                                                {
+                                                    "position": "1",
+                                                    "out_Quantity": {
+                                                        "quantity": "1.5",
+                                                        "quality": "A01",
+                                                    },
+                                                }
+                                            ],
+                                        }
+                                    ],
+                                }
+                            ]
+                        },
+                    }
+                ]
+            }
+        )
         mock_post.return_value = mock_response
 
         result = get_meter_data(
@@ -101,8 +163,9 @@ class TestGetMeterData:
         )
         assert call_args[1]["json"]["meteringPoints"]["meteringPoint"] == ["123456789012345678"]
         assert call_args[1]["headers"]["api-version"] == "1.0"
+        assert call_args[1]["headers"]["Accept-Encoding"] == "gzip, deflate"
 
-    @patch("powerview.src.api_client.requests.post")
+    @patch("powerview.src.api_client._SESSION.post")
     def test_get_meter_data_http_error(self, mock_post):
         """Test meter data retrieval with HTTP error."""
         mock_response = MagicMock()
@@ -114,10 +177,37 @@ class TestGetMeterData:
                 "test_token", "2025-01-01", "2025-01-31", metering_point_ids=["123456789012345678"]
             )
 
+    @patch("powerview.src.api_client._SESSION.post")
+    def test_get_meter_data_debug_log_redacts_token(self, mock_post, caplog):
+        """Test the debug curl command never contains the bearer token."""
+        mock_response = MagicMock()
+        mock_response.content = orjson.dumps({"result": []})
+        mock_post.return_value = mock_response
+
+        with caplog.at_level(logging.DEBUG, logger="powerview.src.api_client"):
+            get_meter_data("secret_token", "2025-01-01", "2025-01-31", metering_point_ids=["1"])
+
+        assert "Bearer ***" in caplog.text
+        assert "secret_token" not in caplog.text
+
+
+def _http_error(status_code: int, headers: dict | None = None) -> requests.HTTPError:
+    """Build an HTTPError carrying a lightweight response stub."""
+    error = requests.HTTPError()
+    error.response = SimpleNamespace(status_code=status_code, headers=headers or {})
+    return error
+
 
 class TestGetMeterDataWithRetry:
     """Tests for get_meter_data_with_retry function."""
 
+    @pytest.fixture(autouse=True)
+    def sleeps(self, monkeypatch):
+        """Record backoff sleeps instead of waiting."""
+        calls = []
+        monkeypatch.setattr("powerview.src.api_client.time.sleep", calls.append)
+        return calls
+
     @patch("powerview.src.api_client.get_meter_data")
     def test_get_meter_data_with_retry_success_first_try(self, mock_get_meter_data):
         """Test successful meter data retrieval on first try."""
@@ -128,14 +218,20 @@ class TestGetMeterDataWithRetry:
         assert result == {"result": []}
         mock_get_meter_data.assert_called_once()
 
-    @patch("powerview.src.api_client.time.sleep")
+    @pytest.mark.parametrize(
+        "status_code",
+        [
+            408,  # request timeout
+            429,  # rate limited
+            503,  # service unavailable
+        ],
+    )
     @patch("powerview.src.api_client.get_meter_data")
-    def test_get_meter_data_with_retry_429_then_success(self, mock_get_meter_data, mock_sleep):
-        """Test retry on HTTP 429 (rate limited) then success."""
-        mock_response = MagicMock()
-        mock_response.status_code = 429
-        error = requests.HTTPError()
-        error.response = mock_response
+    def test_get_meter_data_with_retry_transient_then_success(
+        self, mock_get_meter_data, status_code, sleeps
+    ):
+        """Test retry on a transient HTTP status then success."""
+        error = _http_error(status_code)
 
         mock_get_meter_data.side_effect = [error, {"result": []}]
 
@@ -143,33 +239,25 @@ class TestGetMeterDataWithRetry:
 
         assert result == {"result": []}
         assert mock_get_meter_data.call_count == 2
-        mock_sleep.assert_called_once_with(60)
+        assert len(sleeps) == 1
+        assert 2.0 <= sleeps[0] <= 3.0
 
-    @patch("powerview.src.api_client.time.sleep")
     @patch("powerview.src.api_client.get_meter_data")
-    def test_get_meter_data_with_retry_503_then_success(self, mock_get_meter_data, mock_sleep):
-        """Test retry on HTTP 503 (service unavailable) then success."""
-        mock_response = MagicMock()
-        mock_response.status_code = 503
-        error = requests.HTTPError()
-        error.response = mock_response
+    def test_get_meter_data_with_retry_honors_retry_after(self, mock_get_meter_data, sleeps):
+        """Test that a Retry-After header overrides the computed backoff."""
+        error = _http_error(429, {"Retry-After": "5"})
 
         mock_get_meter_data.side_effect = [error, {"result": []}]
 
         result = get_meter_data_with_retry("test_token", "2025-01-01", "2025-01-31")
 
         assert result == {"result": []}
-        assert mock_get_meter_data.call_count == 2
-        mock_sleep.assert_called_once_with(60)
+        assert sleeps == [5.0]
 
-    @patch("powerview.src.api_client.time.sleep")
     @patch("powerview.src.api_client.get_meter_data")
-    def test_get_meter_data_with_retry_max_retries_exceeded(self, mock_get_meter_data, mock_sleep):
+    def test_get_meter_data_with_retry_max_retries_exceeded(self, mock_get_meter_data, sleeps):
         """Test max retries exceeded for rate limiting."""
-        mock_response = MagicMock()
-        mock_response.status_code = 429
-        error = requests.HTTPError()
-        error.response = mock_response
+        error = _http_error(429)
 
         mock_get_meter_data.side_effect = error
 
@@ -177,15 +265,12 @@ class TestGetMeterDataWithRetry:
             get_meter_data_with_retry("test_token", "2025-01-01", "2025-01-31", max_retries=2)
 
         assert mock_get_meter_data.call_count == 2
-        assert mock_sleep.call_count == 1
+        assert len(sleeps) == 1
 
     @patch("powerview.src.api_client.get_meter_data")
     def test_get_meter_data_with_retry_non_retryable_error(self, mock_get_meter_data):
         """Test non-retryable HTTP error raises immediately."""
-        mock_response = MagicMock()
-        mock_response.status_code = 401
-        error = requests.HTTPError()
-        error.response = mock_response
+        error = _http_error(401)
 
         mock_get_meter_data.side_effect = error
 
@@ -193,3 +278,26 @@ class TestGetMeterDataWithRetry:
             get_meter_data_with_retry("test_token", "2025-01-01", "2025-01-31")
 
         mock_get_meter_data.assert_called_once()
+
+    @patch("powerview.src.api_client._SESSION.post")
+    def test_get_meter_data_with_retry_raises_non_retryable(self, mock_post, sleeps):
+        """Test a 4xx from the API surfaces as NonRetryableError without retrying."""
+        mock_response = requests.Response()
+        mock_response.status_code = 403
+        mock_post.return_value = mock_response
+
+        with pytest.raises(NonRetryableError):
+            get_meter_data_with_retry("test_token", "2025-01-01", "2025-01-31")
+
+        mock_post.assert_called_once()
+        assert sleeps == []
+
+    @patch("powerview.src.api_client.get_meter_data")
+    def test_get_meter_data_with_retry_consults_rate_limiter(self, mock_get_meter_data):
+        """Test that the rate limiter is consulted before each attempt."""
+        mock_get_meter_data.return_value = {"result": []}
+        limiter = MagicMock()
+
+        get_meter_data_with_retry("test_token", "2025-01-01", "2025-01-31", rate_limiter=limiter)
+
+        limiter.wait_for_token.assert_called_once()
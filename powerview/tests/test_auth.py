@@ -2,20 +2,30 @@
 
 from unittest.mock import MagicMock, patch
 
+import orjson
 import pytest
 import requests
 
-from powerview.src.auth import get_access_token
+from powerview.src.auth import clear_token_cache, get_access_token
+
+
+@pytest.fixture(autouse=True)
+def _reset_token_cache():
+    """Ensure cached tokens never leak between tests."""
+    clear_token_cache()
+    yield
+    clear_token_cache()
 
 
 class TestGetAccessToken:
     """Tests for get_access_token function."""
 
-    @patch("powerview.src.auth.requests.get")
-    def test_get_access_token_success(self, mock_get):
+    @patch("powerview.src.auth.get_session")
+    def test_get_access_token_success(self, mock_get_session):
         """Test successful token exchange."""
+        mock_get = mock_get_session.return_value.get
         mock_response = MagicMock()
-        mock_response.json.return_value = {"result": "test_access_token_123"}
+        mock_response.content = orjson.dumps({"result": "test_access_token_123"})
         mock_get.return_value = mock_response
 
         token = get_access_token("test_refresh_token")
@@ -26,9 +36,10 @@ class TestGetAccessToken:
         assert call_args[0][0] == "https://api.eloverblik.dk/CustomerApi/api/token"
         assert call_args[1]["headers"]["Authorization"] == "Bearer test_refresh_token"
 
-    @patch("powerview.src.auth.requests.get")
-    def test_get_access_token_http_error(self, mock_get):
+    @patch("powerview.src.auth.get_session")
+    def test_get_access_token_http_error(self, mock_get_session):
         """Test token exchange with HTTP error."""
+        mock_get = mock_get_session.return_value.get
         mock_response = MagicMock()
         mock_response.raise_for_status.side_effect = requests.HTTPError("401 Unauthorized")
         mock_get.return_value = mock_response
@@ -36,20 +47,58 @@ class TestGetAccessToken:
         with pytest.raises(requests.HTTPError):
             get_access_token("invalid_token")
 
-    @patch("powerview.src.auth.requests.get")
-    def test_get_access_token_missing_result(self, mock_get):
+    @patch("powerview.src.auth.get_session")
+    def test_get_access_token_missing_result(self, mock_get_session):
         """Test token exchange with missing result field."""
+        mock_get = mock_get_session.return_value.get
         mock_response = MagicMock()
-        mock_response.json.return_value = {}
+        mock_response.content = orjson.dumps({})
         mock_get.return_value = mock_response
 
         with pytest.raises(KeyError):
             get_access_token("test_refresh_token")
 
-    @patch("powerview.src.auth.requests.get")
-    def test_get_access_token_network_error(self, mock_get):
+    @patch("powerview.src.auth.get_session")
+    def test_get_access_token_network_error(self, mock_get_session):
         """Test token exchange with network error."""
+        mock_get = mock_get_session.return_value.get
         mock_get.side_effect = requests.ConnectionError("Network error")
 
         with pytest.raises(requests.ConnectionError):
             get_access_token("test_refresh_token")
+
+    def test_get_access_token_uses_explicit_session(self):
+        """Test that a caller-supplied session is used for the token exchange."""
+        mock_session = MagicMock()
+        mock_session.get.return_value.content = orjson.dumps({"result": "session_token"})
+
+        token = get_access_token("test_refresh_token", session=mock_session)
+
+        assert token == "session_token"
+        mock_session.get.assert_called_once()
+
+    @patch("powerview.src.auth.get_session")
+    def test_get_access_token_cached(self, mock_get_session):
+        """Test repeated calls reuse the cached token until it expires."""
+        mock_get = mock_get_session.return_value.get
+        mock_get.return_value.content = orjson.dumps({"result": "cached_token"})
+
+        assert get_access_token("test_refresh_token") == "cached_token"
+        assert get_access_token("test_refresh_token") == "cached_token"
+        assert mock_get.call_count == 1
+
+        with patch("powerview.src.auth.time.monotonic", return_value=float("inf")):
+            get_access_token("test_refresh_token")
+        assert mock_get.call_count == 2
+
+    @patch("powerview.src.auth.get_session")
+    def test_get_access_token_cache_keyed_by_refresh_token(self, mock_get_session):
+        """Test different refresh tokens do not share a cached access token."""
+        mock_get = mock_get_session.return_value.get
+        mock_get.side_effect = [
+            MagicMock(content=orjson.dumps({"result": "token_a"})),
+            MagicMock(content=orjson.dumps({"result": "token_b"})),
+        ]
+
+        assert get_access_token("refresh_a") == "token_a"
+        assert get_access_token("refresh_b") == "token_b"
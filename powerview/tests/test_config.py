@@ -1,18 +1,30 @@
 """Unit tests for the config module."""
 
+import os
 import textwrap
 from unittest.mock import patch
 
 import pytest
+import yaml
 
 from powerview.src.config import (
     _normalize_path,
+    _normalize_path_cached,
+    _reset_dotenv_loaded,
     _resolve_metering_points_path,
     load_config,
     load_metering_points,
 )
 
 
+@pytest.fixture(autouse=True)
+def _reset_dotenv():
+    """Make every test exercise the .env loading path."""
+    _reset_dotenv_loaded()
+    yield
+    _reset_dotenv_loaded()
+
+
 class TestLoadConfig:
     """Tests for load_config function."""
 
@@ -47,6 +59,11 @@ class TestLoadConfig:
         assert config["data_storage_path"] == "./data"
         assert config["state_db_path"] == "./state.duckdb"
 
+        with pytest.raises(TypeError):
+            config["valid_metering_points"]["Injected"] = "meter_999"
+        config["metering_point_ids"]["Injected"] = "meter_999"
+        assert "Injected" not in config["valid_metering_points"]
+
     def test_load_config_missing_refresh_token(self, tmp_path, monkeypatch):
         """Test error when refresh token is missing."""
 
@@ -116,6 +133,60 @@ class TestLoadConfig:
         assert config["log_level"] == "DEBUG"
         assert config["initial_backfill_days"] == 365
 
+    def test_load_config_rate_limit_values(self, tmp_path, monkeypatch):
+        """Test request concurrency and rate settings are read from the environment."""
+
+        file_path = self._write_metering_points_file(
+            tmp_path,
+            """
+            metering_points:
+              "meter_001": {}
+            """,
+        )
+
+        monkeypatch.setenv("ELOVERBLIK_REFRESH_TOKEN", "test_token_123")
+        monkeypatch.setenv("METERING_POINTS_FILE", file_path)
+        monkeypatch.setenv("ELOVERBLIK_MAX_CONCURRENCY", "8")
+        monkeypatch.setenv("ELOVERBLIK_RPS", "0.5")
+
+        with patch("powerview.src.config.load_dotenv"):
+            config = load_config()
+
+        assert config["max_concurrency"] == 8
+        assert config["requests_per_second"] == 0.5
+
+    @pytest.mark.parametrize(
+        ("env_name", "value"),
+        [
+            ("ELOVERBLIK_MAX_CONCURRENCY", "0"),
+            ("ELOVERBLIK_MAX_CONCURRENCY", "-2"),
+            ("ELOVERBLIK_RPS", "0"),
+            ("ELOVERBLIK_RPS", "-1.5"),
+            ("ELOVERBLIK_RPS", "nan"),
+            ("ELOVERBLIK_RPS", "inf"),
+        ],
+    )
+    def test_load_config_rejects_invalid_rate_limit_values(
+        self, tmp_path, monkeypatch, env_name, value
+    ):
+        """Test out-of-range concurrency and rate settings fail at config load."""
+
+        file_path = self._write_metering_points_file(
+            tmp_path,
+            """
+            metering_points:
+              "meter_001": {}
+            """,
+        )
+
+        monkeypatch.setenv("ELOVERBLIK_REFRESH_TOKEN", "test_token_123")
+        monkeypatch.setenv("METERING_POINTS_FILE", file_path)
+        monkeypatch.setenv(env_name, value)
+
+        with patch("powerview.src.config.load_dotenv"):
+            with pytest.raises(ValueError, match=env_name):
+                load_config()
+
     def test_load_config_name_fallback(self, tmp_path, monkeypatch):
         """Ensure IDs become keys when names are missing."""
 
@@ -139,6 +210,18 @@ class TestLoadConfig:
 class TestConfigHelpers:
     """Basic coverage for helper utilities."""
 
+    def test_load_dotenv_called_once_per_process(self, tmp_path, monkeypatch):
+        file_path = tmp_path / "metering_points.yml"
+        file_path.write_text("metering_points:\n  meter_001: {}\n", encoding="utf-8")
+        monkeypatch.setenv("ELOVERBLIK_REFRESH_TOKEN", "test_token")
+        monkeypatch.setenv("METERING_POINTS_FILE", str(file_path))
+
+        with patch("powerview.src.config.load_dotenv") as mock_dotenv:
+            load_config()
+            load_config()
+
+        mock_dotenv.assert_called_once()
+
     def test_load_metering_points_basic(self, tmp_path):
         file_path = tmp_path / "metering_points.yml"
         file_path.write_text(
@@ -157,6 +240,23 @@ class TestConfigHelpers:
         assert result["meter_001"]["name"] == "Solar Export"
         assert result["meter_001"]["id"] == "meter_001"
 
+    def test_load_metering_points_cached_until_modified(self, tmp_path):
+        file_path = tmp_path / "metering_points.yml"
+        file_path.write_text("metering_points:\n  meter_001: {}\n", encoding="utf-8")
+
+        with patch("powerview.src.config.yaml.load", wraps=yaml.load) as mock_load:
+            first = load_metering_points(str(file_path))
+            first["meter_001"]["name"] = "mutated"
+            second = load_metering_points(str(file_path))
+            assert mock_load.call_count == 1
+            assert second["meter_001"]["name"] == "meter_001"
+
+            file_path.write_text("metering_points:\n  meter_002: {}\n", encoding="utf-8")
+            os.utime(file_path, ns=(0, file_path.stat().st_mtime_ns + 1_000_000))
+            third = load_metering_points(str(file_path))
+            assert mock_load.call_count == 2
+            assert list(third) == ["meter_002"]
+
     def test_normalize_path_relative_and_absolute(self, tmp_path, monkeypatch):
         monkeypatch.chdir(tmp_path)
         rel_result = _normalize_path("configs/metering_points.yml")
@@ -166,6 +266,21 @@ class TestConfigHelpers:
         abs_result = _normalize_path(abs_path)
         assert abs_result == abs_path.resolve()
 
+    def test_normalize_path_cached_per_working_directory(self, tmp_path, monkeypatch):
+        first_dir = tmp_path / "first"
+        second_dir = tmp_path / "second"
+        first_dir.mkdir()
+        second_dir.mkdir()
+        _normalize_path_cached.cache_clear()
+
+        monkeypatch.chdir(first_dir)
+        assert _normalize_path("points.yml") == first_dir.resolve() / "points.yml"
+        assert _normalize_path("points.yml") == first_dir.resolve() / "points.yml"
+        assert _normalize_path_cached.cache_info().hits == 1
+
+        monkeypatch.chdir(second_dir)
+        assert _normalize_path("points.yml") == second_dir.resolve() / "points.yml"
+
     def test_resolve_metering_points_respects_env_override(self, tmp_path, monkeypatch):
         custom_file = tmp_path / "custom.yml"
         custom_file.write_text(
@@ -180,3 +295,15 @@ class TestConfigHelpers:
         resolved_path = _resolve_metering_points_path()
 
         assert resolved_path == custom_file.resolve()
+
+    def test_resolve_metering_points_falls_back_to_package_root(self, tmp_path, monkeypatch):
+        package_file = tmp_path / "package" / "metering_points.yml"
+        package_file.parent.mkdir()
+        package_file.write_text("metering_points: {}\n", encoding="utf-8")
+        monkeypatch.delenv("METERING_POINTS_FILE", raising=False)
+        monkeypatch.chdir(tmp_path)
+        monkeypatch.setattr(
+            "powerview.src.config._PACKAGE_DEFAULT_METERING_POINTS", package_file.resolve()
+        )
+
+        assert _resolve_metering_points_path() == package_file.resolve()
@@ -1,14 +1,78 @@
 """Unit tests for the extract module."""
 
 from datetime import UTC, date, datetime, timedelta
+from functools import cache
+from pathlib import Path
+from unittest.mock import MagicMock
 
+import orjson
 import pytest
 
 from powerview.src.extract import (
     chunk_date_range,
     get_timeframe,
     normalize_api_response,
+    normalize_api_response_table,
 )
+from powerview.tests._assert import assert_batch_equals
+
+FIXTURES_DIR = Path(__file__).parent / "fixtures"
+PERIOD_START = datetime(2025, 11, 15, 23, 0, 0, tzinfo=UTC)
+FROZEN_NOW = datetime(2025, 12, 1, 12, 0, 0, tzinfo=UTC)
+
+# Hourly points shared by the normalize tests; normalization never mutates its input
+HOURLY_POINTS = (
+    {"position": "1", "out_Quantity.quantity": "0.5", "out_Quantity.quality": "A04"},
+    {"position": "2", "out_Quantity.quantity": "0.6", "out_Quantity.quality": "A04"},
+    {"position": "3", "out_Quantity.quantity": "0.7", "out_Quantity.quality": "A04"},
+)
+
+
+@pytest.fixture(scope="session")
+def api_response_builder():
+    """Return a builder for single-series API responses wrapping the given points."""
+
+    def build(points, mrid="571313113150035634", start=PERIOD_START):
+        return {
+            "result": [
+                {
+                    "success": True,
+                    "MyEnergyData_MarketDocument": {
+                        "TimeSeries": [
+                            {
+                                "MarketEvaluationPoint": {"mRID": {"name": mrid}},
+                                "measurement_Unit": {"name": "KWH"},
+                                "Period": [
+                                    {"timeInterval": {"start": start.isoformat()}, "Point": points}
+                                ],
+                            }
+                        ]
+                    },
+                }
+            ]
+        }
+
+    return build
+
+
+@pytest.fixture(scope="session")
+def load_fixture():
+    """Return a cached loader for canned API responses under tests/fixtures.
+
+    Loaded responses are shared between tests, so callers must not mutate them.
+    """
+
+    @cache
+    def load(name):
+        return orjson.loads((FIXTURES_DIR / f"{name}.json").read_bytes())
+
+    return load
+
+
+@pytest.fixture(scope="session")
+def tracked_mp_ids():
+    """Return the name-to-ID mapping for the metering point used by the builder."""
+    return {"mp1": "571313113150035634"}
 
 
 class TestGetTimeframe:
@@ -17,10 +81,17 @@ class TestGetTimeframe:
     @pytest.fixture
     def mock_duckdb(self, monkeypatch):
         """Mock DuckDB for state queries."""
-        from unittest.mock import patch
-
-        with patch("powerview.src.storage.get_last_ingestion_date") as mock_get:
-            yield mock_get
+        # get_timeframe imports the helper at call time, so patch it where it is defined
+        mock_get = MagicMock()
+        monkeypatch.setattr("powerview.src.storage.get_last_ingestion_date", mock_get)
+        return mock_get
+
+    @pytest.fixture(autouse=True)
+    def frozen_now(self, monkeypatch):
+        """Freeze the extract module's clock at FROZEN_NOW so date_to never races midnight."""
+        mock_datetime = MagicMock(wraps=datetime)
+        mock_datetime.now.return_value = FROZEN_NOW
+        monkeypatch.setattr("powerview.src.extract.datetime", mock_datetime)
 
     def test_get_timeframe_no_prior_ingestion(self, mock_duckdb):
         """Test timeframe calculation with no prior ingestion (full backfill)."""
@@ -28,8 +99,8 @@ class TestGetTimeframe:
 
         date_from, date_to = get_timeframe("test_mp_id", initial_backfill_days=1095)
 
-        assert date_to == datetime.now(UTC).date()
-        assert (date_to - date_from).days == 1095
+        assert date_to == date(2025, 12, 1)
+        assert date_from == date(2022, 12, 2)
 
     def test_get_timeframe_with_prior_ingestion(self, mock_duckdb):
         """Test timeframe calculation with prior ingestion (7-day overlap)."""
@@ -40,43 +111,62 @@ class TestGetTimeframe:
 
         # Should start 7 days before last ingestion
         assert date_from == date(2025, 11, 13)
-        assert date_to == datetime.now(UTC).date()
+        assert date_to == date(2025, 12, 1)
 
+    def test_get_timeframe_uses_supplied_today(self, mock_duckdb):
+        """Test an explicit today ends the range without consulting the clock."""
+        mock_duckdb.return_value = None
 
-class TestChunkDateRange:
-    """Tests for chunk_date_range function."""
+        date_from, date_to = get_timeframe(
+            "test_mp_id", initial_backfill_days=90, today=date(2025, 6, 1)
+        )
 
-    def test_chunk_date_range_within_single_chunk(self):
-        """Test date range that fits within single chunk."""
-        date_from = date(2025, 11, 1)
-        date_to = date(2025, 11, 30)
+        assert (date_from, date_to) == (date(2025, 3, 3), date(2025, 6, 1))
 
-        chunks = chunk_date_range(date_from, date_to, chunk_days=90)
 
-        assert len(chunks) == 1
-        assert chunks[0] == (date(2025, 11, 1), date(2025, 11, 30))
+class TestChunkDateRange:
+    """Tests for chunk_date_range function."""
 
-    def test_chunk_date_range_multiple_chunks(self):
-        """Test date range that requires multiple chunks."""
-        date_from = date(2025, 1, 1)
+    @pytest.mark.parametrize(
+        ("date_from", "date_to", "chunk_days", "expected_len"),
+        [
+            # Fits within a single chunk
+            (date(2025, 11, 1), date(2025, 11, 30), 90, 1),
+            # Requires multiple chunks of ~90 days each
+            (date(2025, 1, 1), date(2025, 12, 31), 95, 4),
+            # Exactly 90 days
+            (date(2025, 1, 1), date(2025, 3, 31), 90, 1),
+        ],
+    )
+    def test_chunk_date_range_shape(self, date_from, date_to, chunk_days, expected_len):
+        """Test chunk count and outer bounds for representative ranges."""
+        chunks = chunk_date_range(date_from, date_to, chunk_days=chunk_days)
+
+        assert len(chunks) == expected_len
+        assert chunks[0][0] == date_from
+        assert chunks[-1][1] == date_to
+
+    def test_chunk_date_range_contiguous_and_bounded(self):
+        """Test chunks tile the range without gaps and never exceed chunk_days."""
+        date_from = date(2023, 1, 1)
         date_to = date(2025, 12, 31)
 
-        chunks = chunk_date_range(date_from, date_to, chunk_days=95)
+        chunks = chunk_date_range(date_from, date_to, chunk_days=7)
 
-        # Should split into 4 chunks of ~90 days each
-        assert len(chunks) == 4
-        assert chunks[0][0] == date(2025, 1, 1)
-        assert chunks[-1][1] == date(2025, 12, 31)
+        assert chunks[0][0] == date_from
+        assert chunks[-1][1] == date_to
+        for (_, prev_end), (next_start, _) in zip(chunks, chunks[1:], strict=False):
+            assert next_start == prev_end + timedelta(days=1)
+        assert all((end - start).days < 7 for start, end in chunks)
 
-    def test_chunk_date_range_exactly_90_days(self):
-        """Test date range of exactly 90 days."""
-        date_from = date(2025, 1, 1)
-        date_to = date(2025, 3, 31)
+    def test_chunk_date_range_empty_when_reversed(self):
+        """Test that a start date after the end date yields no chunks."""
+        assert chunk_date_range(date(2025, 2, 1), date(2025, 1, 1)) == []
 
-        chunks = chunk_date_range(date_from, date_to, chunk_days=90)
-
-        assert len(chunks) == 1
-        assert chunks[0] == (date_from, date_to)
+    def test_chunk_date_range_invalid_chunk_days(self):
+        """Test that non-positive chunk sizes are rejected."""
+        with pytest.raises(ValueError):
+            chunk_date_range(date(2025, 1, 1), date(2025, 1, 31), chunk_days=0)
 
 
 class TestNormalizeApiResponse:
@@ -108,39 +198,11 @@ class TestNormalizeApiResponse:
 
         assert len(records) == 0
 
-    def test_normalize_single_point(self):
+    def test_normalize_single_point(self, api_response_builder, tracked_mp_ids):
         """Test normalizing single consumption point with correct flat field structure."""
-        now = datetime.now(UTC)
-        api_response = {
-            "result": [
-                {
-                    "success": True,
-                    "MyEnergyData_MarketDocument": {
-                        "TimeSeries": [
-                            {
-                                "MarketEvaluationPoint": {"mRID": {"name": "571313113150035634"}},
-                                "measurement_Unit": {"name": "KWH"},
-                                "Period": [
-                                    {
-                                        "timeInterval": {"start": now.isoformat()},
-                                        "Point": [
-                                            {
-                                                "position": "1",
-                                                "out_Quantity.quantity": "0.5",
-                                                "out_Quantity.quality": "A04",
-                                            }
-                                        ],
-                                    }
-                                ],
-                            }
-                        ]
-                    },
-                }
-            ]
-        }
-        metering_point_ids = {"mp1": "571313113150035634"}
+        api_response = api_response_builder(list(HOURLY_POINTS[:1]))
 
-        records = normalize_api_response(api_response, metering_point_ids)
+        records = normalize_api_response(api_response, tracked_mp_ids)
 
         assert len(records) == 1
         assert records[0]["metering_point_id"] == "571313113150035634"
@@ -148,205 +210,112 @@ class TestNormalizeApiResponse:
         assert records[0]["quality"] == "A04"
         assert records[0]["unit"] == "KWH"
 
-    def test_normalize_multiple_points_same_period(self):
+    def test_normalize_multiple_points_same_period(self, api_response_builder, tracked_mp_ids):
         """Test normalizing multiple hourly points in same period."""
-        now = datetime.now(UTC)
-        api_response = {
-            "result": [
-                {
-                    "success": True,
-                    "MyEnergyData_MarketDocument": {
-                        "TimeSeries": [
-                            {
-                                "MarketEvaluationPoint": {"mRID": {"name": "571313113150035634"}},
-                                "measurement_Unit": {"name": "KWH"},
-                                "Period": [
-                                    {
-                                        "timeInterval": {"start": now.isoformat()},
-                                        "Point": [
-                                            {
-                                                "position": "1",
-                                                "out_Quantity.quantity": "0.5",
-                                                "out_Quantity.quality": "A04",
-                                            },
-                                            {
-                                                "position": "2",
-                                                "out_Quantity.quantity": "0.6",
-                                                "out_Quantity.quality": "A04",
-                                            },
-                                            {
-                                                "position": "3",
-                                                "out_Quantity.quantity": "0.7",
-                                                "out_Quantity.quality": "A04",
-                                            },
-                                        ],
-                                    }
-                                ],
-                            }
-                        ]
-                    },
-                }
-            ]
-        }
-        metering_point_ids = {"mp1": "571313113150035634"}
+        api_response = api_response_builder(list(HOURLY_POINTS))
 
-        records = normalize_api_response(api_response, metering_point_ids)
+        records = normalize_api_response(api_response, tracked_mp_ids)
 
-        assert len(records) == 3
-        assert records[0]["consumption_value"] == 0.5
-        assert records[1]["consumption_value"] == 0.6
-        assert records[2]["consumption_value"] == 0.7
+        assert_batch_equals(
+            records,
+            [{"consumption_value": 0.5}, {"consumption_value": 0.6}, {"consumption_value": 0.7}],
+        )
 
-    def test_normalize_timestamp_calculation(self):
+    def test_normalize_timestamp_calculation(self, api_response_builder, tracked_mp_ids):
         """Test that timestamps are calculated correctly (position offset)."""
-        period_start = datetime(2025, 11, 15, 23, 0, 0, tzinfo=UTC)
-        api_response = {
-            "result": [
-                {
-                    "success": True,
-                    "MyEnergyData_MarketDocument": {
-                        "TimeSeries": [
-                            {
-                                "MarketEvaluationPoint": {"mRID": {"name": "571313113150035634"}},
-                                "measurement_Unit": {"name": "KWH"},
-                                "Period": [
-                                    {
-                                        "timeInterval": {"start": period_start.isoformat()},
-                                        "Point": [
-                                            {
-                                                "position": "1",
-                                                "out_Quantity.quantity": "0.5",
-                                                "out_Quantity.quality": "A04",
-                                            },
-                                            {
-                                                "position": "2",
-                                                "out_Quantity.quantity": "0.6",
-                                                "out_Quantity.quality": "A04",
-                                            },
-                                        ],
-                                    }
-                                ],
-                            }
-                        ]
-                    },
-                }
-            ]
-        }
-        metering_point_ids = {"mp1": "571313113150035634"}
+        api_response = api_response_builder(list(HOURLY_POINTS[:2]))
 
-        records = normalize_api_response(api_response, metering_point_ids)
+        records = normalize_api_response(api_response, tracked_mp_ids)
 
         # Position 1 = period_start + 0 hours
-        assert records[0]["timestamp"] == period_start
+        assert records[0]["timestamp"] == PERIOD_START
         # Position 2 = period_start + 1 hour
-        assert records[1]["timestamp"] == period_start + timedelta(hours=1)
+        assert records[1]["timestamp"] == PERIOD_START + timedelta(hours=1)
 
-    def test_normalize_filters_untracked_metering_points(self):
+    def test_normalize_filters_untracked_metering_points(self, api_response_builder):
         """Test that untracked metering points are filtered out."""
-        now = datetime.now(UTC)
-        api_response = {
-            "result": [
-                {
-                    "success": True,
-                    "MyEnergyData_MarketDocument": {
-                        "TimeSeries": [
-                            {
-                                "MarketEvaluationPoint": {"mRID": {"name": "untracked_mp"}},
-                                "measurement_Unit": {"name": "KWH"},
-                                "Period": [
-                                    {
-                                        "timeInterval": {"start": now.isoformat()},
-                                        "Point": [
-                                            {
-                                                "position": "1",
-                                                "out_Quantity.quantity": "0.5",
-                                                "out_Quantity.quality": "A04",
-                                            }
-                                        ],
-                                    }
-                                ],
-                            }
-                        ]
-                    },
-                }
-            ]
-        }
+        api_response = api_response_builder(list(HOURLY_POINTS[:1]), mrid="untracked_mp")
         metering_point_ids = {"mp1": "tracked_mp_only"}
 
         records = normalize_api_response(api_response, metering_point_ids)
 
         assert len(records) == 0
 
-    def test_normalize_missing_quantity_defaults_to_zero(self):
+    def test_normalize_missing_quantity_defaults_to_zero(
+        self, api_response_builder, tracked_mp_ids
+    ):
         """Test that missing quantity defaults to 0."""
-        now = datetime.now(UTC)
-        api_response = {
-            "result": [
-                {
-                    "success": True,
-                    "MyEnergyData_MarketDocument": {
-                        "TimeSeries": [
-                            {
-                                "MarketEvaluationPoint": {"mRID": {"name": "571313113150035634"}},
-                                "measurement_Unit": {"name": "KWH"},
-                                "Period": [
-                                    {
-                                        "timeInterval": {"start": now.isoformat()},
-                                        "Point": [
-                                            {
-                                                "position": "1",
-                                                # Missing out_Quantity.quantity field
-                                                "out_Quantity.quality": "A04",
-                                            }
-                                        ],
-                                    }
-                                ],
-                            }
-                        ]
-                    },
-                }
-            ]
-        }
-        metering_point_ids = {"mp1": "571313113150035634"}
+        # Missing out_Quantity.quantity field
+        api_response = api_response_builder([{"position": "1", "out_Quantity.quality": "A04"}])
 
-        records = normalize_api_response(api_response, metering_point_ids)
+        records = normalize_api_response(api_response, tracked_mp_ids)
 
         assert len(records) == 1
         assert records[0]["consumption_value"] == 0.0
 
-    def test_normalize_string_quantity_converted_to_float(self):
+    def test_normalize_string_quantity_converted_to_float(
+        self, api_response_builder, tracked_mp_ids
+    ):
         """Test that string quantity is properly converted to float."""
-        now = datetime.now(UTC)
-        api_response = {
-            "result": [
-                {
-                    "success": True,
-                    "MyEnergyData_MarketDocument": {
-                        "TimeSeries": [
-                            {
-                                "MarketEvaluationPoint": {"mRID": {"name": "571313113150035634"}},
-                                "measurement_Unit": {"name": "KWH"},
-                                "Period": [
-                                    {
-                                        "timeInterval": {"start": now.isoformat()},
-                                        "Point": [
-                                            {
-                                                "position": "1",
-                                                "out_Quantity.quantity": "1.234",
-                                                "out_Quantity.quality": "A04",
-                                            }
-                                        ],
-                                    }
-                                ],
-                            }
-                        ]
-                    },
-                }
-            ]
-        }
-        metering_point_ids = {"mp1": "571313113150035634"}
+        api_response = api_response_builder(
+            [{"position": "1", "out_Quantity.quantity": "1.234", "out_Quantity.quality": "A04"}]
+        )
 
-        records = normalize_api_response(api_response, metering_point_ids)
+        records = normalize_api_response(api_response, tracked_mp_ids)
 
         assert len(records) == 1
         assert records[0]["consumption_value"] == 1.234
+
+    def test_normalize_shares_ingestion_timestamp(self, load_fixture):
+        """Test that all records from one call share a single ingestion timestamp."""
+        api_response = load_fixture("unit_less_with_null_series")
+        metering_point_ids = {"mp1": "571313113150035634"}
+
+        records = normalize_api_response(api_response, metering_point_ids)
+
+        assert len(records) == 2
+        assert records[0]["ingestion_timestamp"] == records[1]["ingestion_timestamp"]
+        assert records[0]["unit"] == "kWh"
+
+    def test_normalize_accepts_prebuilt_id_set(self, load_fixture):
+        """Test that a frozenset of IDs filters the same way as a name-to-ID mapping."""
+        api_response = load_fixture("tracked_and_untracked_series")
+
+        records = normalize_api_response(api_response, frozenset({"571313113150035634"}))
+
+        assert [r["metering_point_id"] for r in records] == ["571313113150035634"]
+
+
+class TestNormalizeApiResponseTable:
+    """Tests for normalize_api_response_table function."""
+
+    def test_normalize_table_empty_response(self):
+        """Test that an empty response yields an empty table with the full schema."""
+        table = normalize_api_response_table({"result": []}, {"mp1": "571313113150035634"})
+
+        assert table.num_rows == 0
+        assert table.column_names == [
+            "metering_point_id",
+            "timestamp",
+            "consumption_value",
+            "quality",
+            "unit",
+            "ingestion_timestamp",
+            "ingestion_date",
+        ]
+
+    def test_normalize_table_matches_record_output(self, api_response_builder, tracked_mp_ids):
+        """Test that the columnar output matches the list-of-dicts output."""
+        api_response = api_response_builder(list(HOURLY_POINTS[:2]))
+
+        table = normalize_api_response_table(api_response, tracked_mp_ids)
+        records = normalize_api_response(api_response, tracked_mp_ids)
+
+        assert table.num_rows == len(records) == 2
+        assert table.column("timestamp").to_pylist() == [
+            PERIOD_START,
+            PERIOD_START + timedelta(hours=1),
+        ]
+        for column in ("metering_point_id", "consumption_value", "quality", "unit"):
+            assert table.column(column).to_pylist() == [r[column] for r in records]
+        assert len(set(table.column("ingestion_timestamp").to_pylist())) == 1
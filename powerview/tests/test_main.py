@@ -1,242 +1,166 @@
 """Unit tests for the main module."""
 
 from datetime import date
-from unittest.mock import patch
+from types import SimpleNamespace
+from unittest.mock import Mock
 
+import pytest
+
+import powerview.src.main as main_module
 from powerview.src.main import main
 
+DEFAULT_CONFIG = {
+    "log_level": "INFO",
+    "state_db_path": "./test.duckdb",
+    "refresh_token": "test_refresh",
+    "valid_metering_points": {"test_meter": "123456"},
+    "initial_backfill_days": 30,
+    "data_storage_path": "./test_data",
+    "max_concurrency": 4,
+    "requests_per_second": 100.0,
+}
+
+_PATCHED_NAMES = (
+    "load_config",
+    "init_duckdb_state",
+    "get_access_token",
+    "get_timeframe",
+    "chunk_date_range",
+    "get_meter_data_with_retry",
+    "normalize_api_response_table",
+    "save_to_parquet",
+    "update_last_ingestion_dates",
+)
+
+
+@pytest.fixture(autouse=True)
+def main_mocks(monkeypatch):
+    """Patch every collaborator of main() and return the mocks by name."""
+    mocks = SimpleNamespace()
+    for name in _PATCHED_NAMES:
+        # Plain Mock skips MagicMock's magic-method wiring; spec still rejects typos
+        mock = Mock(spec=getattr(main_module, name))
+        monkeypatch.setattr(f"powerview.src.main.{name}", mock)
+        setattr(mocks, name, mock)
+
+    mocks.load_config.return_value = dict(DEFAULT_CONFIG)
+    mocks.get_access_token.return_value = "test_access_token"
+    mocks.get_timeframe.return_value = (date(2025, 11, 1), date(2025, 12, 1))
+    mocks.chunk_date_range.return_value = [(date(2025, 11, 1), date(2025, 12, 1))]
+    mocks.get_meter_data_with_retry.return_value = {"result": []}
+    mocks.normalize_api_response_table.return_value = []
+    return mocks
+
 
 class TestMain:
     """Tests for main function."""
 
-    @patch("powerview.src.main.load_config")
-    @patch("powerview.src.main.init_duckdb_state")
-    @patch("powerview.src.main.get_access_token")
-    @patch("powerview.src.main.get_timeframe")
-    @patch("powerview.src.main.chunk_date_range")
-    @patch("powerview.src.main.get_meter_data_with_retry")
-    @patch("powerview.src.main.normalize_api_response")
-    @patch("powerview.src.main.save_to_parquet")
-    @patch("powerview.src.main.update_last_ingestion_date")
-    def test_main_success(
-        self,
-        mock_update_state,
-        mock_save,
-        mock_normalize,
-        mock_get_data,
-        mock_chunk,
-        mock_timeframe,
-        mock_token,
-        mock_init_db,
-        mock_config,
-    ):
+    def test_main_success(self, main_mocks):
         """Test successful main execution with one metering point."""
-        # Setup mocks
-        mock_config.return_value = {
-            "log_level": "INFO",
-            "state_db_path": "./test.duckdb",
-            "refresh_token": "test_refresh",
-            "valid_metering_points": {"test_meter": "123456"},
-            "initial_backfill_days": 30,
-            "data_storage_path": "./test_data",
-        }
-        mock_token.return_value = "test_access_token"
-        mock_timeframe.return_value = (date(2025, 11, 1), date(2025, 12, 1))
-        mock_chunk.return_value = [(date(2025, 11, 1), date(2025, 12, 1))]
-        mock_get_data.return_value = {"result": []}
-        mock_normalize.return_value = []
-
-        # Execute
         main()
 
-        # Verify
-        mock_config.assert_called_once()
-        mock_init_db.assert_called_once_with("./test.duckdb")
-        mock_token.assert_called_once_with("test_refresh")
-        mock_timeframe.assert_called_once()
-        mock_get_data.assert_called_once()
-        mock_normalize.assert_called_once()
-        mock_save.assert_called_once()
-        mock_update_state.assert_called_once()
-
-    @patch("powerview.src.main.load_config")
-    def test_main_config_error(self, mock_config):
-        """Test main handles configuration errors gracefully."""
-        mock_config.side_effect = ValueError("Missing config")
+        main_mocks.load_config.assert_called_once()
+        main_mocks.init_duckdb_state.assert_called_once_with("./test.duckdb")
+        main_mocks.get_access_token.assert_called_once_with("test_refresh")
+        main_mocks.get_timeframe.assert_called_once()
+        main_mocks.get_meter_data_with_retry.assert_called_once()
+        main_mocks.normalize_api_response_table.assert_called_once_with(
+            {"result": []}, frozenset({"123456"})
+        )
+        main_mocks.save_to_parquet.assert_called_once()
+        main_mocks.update_last_ingestion_dates.assert_called_once()
+
+    @pytest.mark.parametrize(
+        ("failing_step", "exc", "skipped_step"),
+        [
+            ("load_config", ValueError("Missing config"), "init_duckdb_state"),
+            ("init_duckdb_state", Exception("DB error"), "get_access_token"),
+            ("get_access_token", Exception("Token error"), "get_meter_data_with_retry"),
+        ],
+    )
+    def test_main_setup_error(self, main_mocks, failing_step, exc, skipped_step):
+        """Test main logs and returns when a setup step fails."""
+        getattr(main_mocks, failing_step).side_effect = exc
 
         # Should not raise, just log and return
         main()
 
-        mock_config.assert_called_once()
-
-    @patch("powerview.src.main.load_config")
-    @patch("powerview.src.main.init_duckdb_state")
-    def test_main_db_init_error(self, mock_init_db, mock_config):
-        """Test main handles database initialization errors."""
-        mock_config.return_value = {
-            "log_level": "INFO",
-            "state_db_path": "./test.duckdb",
-            "refresh_token": "test_refresh",
-            "valid_metering_points": {},
-            "initial_backfill_days": 30,
-            "data_storage_path": "./test_data",
-        }
-        mock_init_db.side_effect = Exception("DB error")
-
-        # Should not raise, just log and return
-        main()
+        getattr(main_mocks, failing_step).assert_called_once()
+        getattr(main_mocks, skipped_step).assert_not_called()
 
-        mock_init_db.assert_called_once()
-
-    @patch("powerview.src.main.load_config")
-    @patch("powerview.src.main.init_duckdb_state")
-    @patch("powerview.src.main.get_access_token")
-    def test_main_token_error(self, mock_token, mock_init_db, mock_config):
-        """Test main handles token retrieval errors."""
-        mock_config.return_value = {
-            "log_level": "INFO",
-            "state_db_path": "./test.duckdb",
-            "refresh_token": "test_refresh",
-            "valid_metering_points": {},
-            "initial_backfill_days": 30,
-            "data_storage_path": "./test_data",
+    def test_main_multiple_metering_points(self, main_mocks):
+        """Test main processes multiple metering points."""
+        main_mocks.load_config.return_value["valid_metering_points"] = {
+            "meter1": "123456",
+            "meter2": "789012",
         }
-        mock_token.side_effect = Exception("Token error")
 
-        # Should not raise, just log and return
         main()
 
-        mock_token.assert_called_once()
-
-    @patch("powerview.src.main.load_config")
-    @patch("powerview.src.main.init_duckdb_state")
-    @patch("powerview.src.main.get_access_token")
-    @patch("powerview.src.main.get_timeframe")
-    @patch("powerview.src.main.chunk_date_range")
-    @patch("powerview.src.main.get_meter_data_with_retry")
-    @patch("powerview.src.main.normalize_api_response")
-    @patch("powerview.src.main.save_to_parquet")
-    @patch("powerview.src.main.update_last_ingestion_date")
-    def test_main_multiple_metering_points(
-        self,
-        mock_update_state,
-        mock_save,
-        mock_normalize,
-        mock_get_data,
-        mock_chunk,
-        mock_timeframe,
-        mock_token,
-        mock_init_db,
-        mock_config,
-    ):
-        """Test main processes multiple metering points."""
-        mock_config.return_value = {
-            "log_level": "INFO",
-            "state_db_path": "./test.duckdb",
-            "refresh_token": "test_refresh",
-            "valid_metering_points": {
-                "meter1": "123456",
-                "meter2": "789012",
-            },
-            "initial_backfill_days": 30,
-            "data_storage_path": "./test_data",
-        }
-        mock_token.return_value = "test_access_token"
-        mock_timeframe.return_value = (date(2025, 11, 1), date(2025, 12, 1))
-        mock_chunk.return_value = [(date(2025, 11, 1), date(2025, 12, 1))]
-        mock_get_data.return_value = {"result": []}
-        mock_normalize.return_value = []
+        # Verify both metering points were processed in one batched request
+        assert main_mocks.get_timeframe.call_count == 2
+        # The clock is read once, so both ranges end on the same day
+        assert len({c.kwargs["today"] for c in main_mocks.get_timeframe.call_args_list}) == 1
+        main_mocks.get_meter_data_with_retry.assert_called_once()
+        call_kwargs = main_mocks.get_meter_data_with_retry.call_args[1]
+        assert call_kwargs["metering_point_ids"] == ["123456", "789012"]
+        # Both state updates are persisted in a single batched call
+        main_mocks.update_last_ingestion_dates.assert_called_once_with(
+            [("123456", date(2025, 12, 1)), ("789012", date(2025, 12, 1))], "./test.duckdb"
+        )
+
+    def test_main_chunk_failure_no_state_update(self, main_mocks):
+        """Test main does not update state when all chunks fail."""
+        main_mocks.get_meter_data_with_retry.side_effect = Exception("API error")
 
-        # Execute
         main()
 
-        # Verify both metering points were processed
-        assert mock_timeframe.call_count == 2
-        assert mock_get_data.call_count == 2
-        assert mock_update_state.call_count == 2
-
-    @patch("powerview.src.main.load_config")
-    @patch("powerview.src.main.init_duckdb_state")
-    @patch("powerview.src.main.get_access_token")
-    @patch("powerview.src.main.get_timeframe")
-    @patch("powerview.src.main.chunk_date_range")
-    @patch("powerview.src.main.get_meter_data_with_retry")
-    def test_main_chunk_failure_no_state_update(
-        self,
-        mock_get_data,
-        mock_chunk,
-        mock_timeframe,
-        mock_token,
-        mock_init_db,
-        mock_config,
-    ):
-        """Test main does not update state when all chunks fail."""
-        mock_config.return_value = {
-            "log_level": "INFO",
-            "state_db_path": "./test.duckdb",
-            "refresh_token": "test_refresh",
-            "valid_metering_points": {"test_meter": "123456"},
-            "initial_backfill_days": 30,
-            "data_storage_path": "./test_data",
-        }
-        mock_token.return_value = "test_access_token"
-        mock_timeframe.return_value = (date(2025, 11, 1), date(2025, 12, 1))
-        mock_chunk.return_value = [(date(2025, 11, 1), date(2025, 12, 1))]
-        mock_get_data.side_effect = Exception("API error")
-
-        # Execute
-        with patch("powerview.src.main.update_last_ingestion_date") as mock_update:
-            main()
-
-            # State should not be updated when all chunks fail
-            mock_update.assert_not_called()
-
-    @patch("powerview.src.main.load_config")
-    @patch("powerview.src.main.init_duckdb_state")
-    @patch("powerview.src.main.get_access_token")
-    @patch("powerview.src.main.get_timeframe")
-    @patch("powerview.src.main.chunk_date_range")
-    @patch("powerview.src.main.get_meter_data_with_retry")
-    @patch("powerview.src.main.normalize_api_response")
-    @patch("powerview.src.main.save_to_parquet")
-    @patch("powerview.src.main.update_last_ingestion_date")
-    def test_main_multiple_chunks(
-        self,
-        mock_update_state,
-        mock_save,
-        mock_normalize,
-        mock_get_data,
-        mock_chunk,
-        mock_timeframe,
-        mock_token,
-        mock_init_db,
-        mock_config,
-    ):
+        # State should not be updated when all chunks fail
+        main_mocks.update_last_ingestion_dates.assert_not_called()
+
+    def test_main_multiple_chunks(self, main_mocks):
         """Test main processes multiple date chunks."""
-        mock_config.return_value = {
-            "log_level": "INFO",
-            "state_db_path": "./test.duckdb",
-            "refresh_token": "test_refresh",
-            "valid_metering_points": {"test_meter": "123456"},
-            "initial_backfill_days": 30,
-            "data_storage_path": "./test_data",
-        }
-        mock_token.return_value = "test_access_token"
-        mock_timeframe.return_value = (date(2025, 9, 1), date(2025, 12, 1))
-        mock_chunk.return_value = [
+        main_mocks.get_timeframe.return_value = (date(2025, 9, 1), date(2025, 12, 1))
+        main_mocks.chunk_date_range.return_value = [
             (date(2025, 9, 1), date(2025, 10, 1)),
             (date(2025, 10, 1), date(2025, 11, 1)),
             (date(2025, 11, 1), date(2025, 12, 1)),
         ]
-        mock_get_data.return_value = {"result": []}
-        mock_normalize.return_value = []
 
-        # Execute
         main()
 
         # Verify all chunks were processed
-        assert mock_get_data.call_count == 3
-        assert mock_normalize.call_count == 3
-        assert mock_save.call_count == 3
+        assert main_mocks.get_meter_data_with_retry.call_count == 3
+        assert main_mocks.normalize_api_response_table.call_count == 3
+        assert main_mocks.save_to_parquet.call_count == 3
         # State updated once per metering point (after all chunks)
-        mock_update_state.assert_called_once()
+        main_mocks.update_last_ingestion_dates.assert_called_once()
+
+    def test_main_concurrent_failure_isolated_per_meter(self, main_mocks):
+        """Test a failing meter does not block state updates for other meters."""
+        main_mocks.load_config.return_value["valid_metering_points"] = {
+            "meter1": "123456",
+            "meter2": "789012",
+        }
+        main_mocks.get_timeframe.side_effect = [
+            (date(2025, 11, 1), date(2025, 12, 1)),
+            (date(2025, 11, 2), date(2025, 12, 1)),
+        ]
+        main_mocks.chunk_date_range.side_effect = [
+            [(date(2025, 11, 1), date(2025, 12, 1))],
+            [(date(2025, 11, 2), date(2025, 12, 1))],
+        ]
+
+        def fake_get_data(token, date_from, date_to, metering_point_ids, rate_limiter):
+            if metering_point_ids == ["123456"]:
+                raise Exception("API error")
+            return {"result": []}
+
+        main_mocks.get_meter_data_with_retry.side_effect = fake_get_data
+
+        main()
+
+        assert main_mocks.get_meter_data_with_retry.call_count == 2
+        main_mocks.update_last_ingestion_dates.assert_called_once_with(
+            [("789012", date(2025, 12, 1))], "./test.duckdb"
+        )
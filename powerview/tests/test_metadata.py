@@ -2,7 +2,8 @@
 
 import json
 
-import duckdb
+import pyarrow as pa
+
 from powerview.src.metadata import build_metadata_frame, load_metadata_table
 
 
@@ -18,14 +19,41 @@ def test_build_metadata_frame_handles_extra_fields():
         }
     }
 
-    frame = build_metadata_frame(metering_points)
+    table = build_metadata_frame(metering_points)
+    row = table.to_pylist()[0]
+
+    assert row["metering_point_id"] == "meter_001"
+    assert row["name"] == "Solar"
+    assert json.loads(row["extra_metadata"]) == {"custom": "value"}
+
+
+def test_build_metadata_frame_serializes_non_ascii_and_non_string_keys():
+    """Extras with non-ASCII text and YAML integer keys should serialize as JSON."""
+
+    table = build_metadata_frame({"meter_001": {"owner": "Søren", 2024: "tariff"}})
+    extras = json.loads(table.column("extra_metadata")[0].as_py())
+
+    assert extras == {"owner": "Søren", "2024": "tariff"}
+
+
+def test_build_metadata_frame_empty_keeps_columns():
+    """An empty mapping should still produce the full column layout."""
+
+    table = build_metadata_frame({})
 
-    assert frame.loc[0, "metering_point_id"] == "meter_001"
-    assert frame.loc[0, "name"] == "Solar"
-    assert json.loads(frame.loc[0, "extra_metadata"]) == {"custom": "value"}
+    assert table.num_rows == 0
+    assert all(field.type == pa.string() for field in table.schema)
+    assert table.column_names == [
+        "metering_point_id",
+        "name",
+        "type",
+        "location",
+        "description",
+        "extra_metadata",
+    ]
 
 
-def test_load_metadata_table_creates_table(tmp_path):
+def test_load_metadata_table_creates_table(duckdb_conn):
     """Verify DuckDB table creation from metadata DataFrame."""
 
     metering_points = {
@@ -36,14 +64,10 @@ def test_load_metadata_table_creates_table(tmp_path):
         }
     }
 
-    db_path = tmp_path / "metadata.duckdb"
-    connection = duckdb.connect(str(db_path))
-    try:
-        load_metadata_table(connection, metering_points)
-        rows = connection.execute(
-            "SELECT metering_point_id, name FROM reporting.meter_metadata"
-        ).fetchall()
-    finally:
-        connection.close()
+    duckdb_conn.execute("DROP SCHEMA IF EXISTS reporting CASCADE")
+    load_metadata_table(duckdb_conn, metering_points)
+    rows = duckdb_conn.execute(
+        "SELECT metering_point_id, name FROM reporting.meter_metadata"
+    ).fetchall()
 
     assert rows == [("meter_001", "Solar")]
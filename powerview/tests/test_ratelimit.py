@@ -0,0 +1,39 @@
+"""Unit tests for the ratelimit module."""
+
+from unittest.mock import patch
+
+import pytest
+
+from powerview.src.ratelimit import RateLimiter
+
+
+class TestRateLimiter:
+    """Tests for RateLimiter class."""
+
+    @patch("powerview.src.ratelimit.time.sleep")
+    def test_burst_does_not_wait(self, mock_sleep):
+        """Test that requests within the burst size are served immediately."""
+        limiter = RateLimiter(rate=1.0, burst=3)
+
+        for _ in range(3):
+            limiter.wait_for_token()
+
+        mock_sleep.assert_not_called()
+
+    @patch("powerview.src.ratelimit.time.sleep")
+    @patch("powerview.src.ratelimit.time.monotonic")
+    def test_waits_when_bucket_empty(self, mock_monotonic, mock_sleep):
+        """Test that an empty bucket blocks until a token has refilled."""
+        mock_monotonic.side_effect = [0.0, 0.0, 0.0, 0.5]
+        limiter = RateLimiter(rate=2.0, burst=1)
+
+        limiter.wait_for_token()
+        limiter.wait_for_token()
+
+        mock_sleep.assert_called_once_with(0.5)
+
+    @pytest.mark.parametrize(("rate", "burst"), [(0, 10), (-1.0, 10), (1.0, 0)])
+    def test_invalid_arguments(self, rate, burst):
+        """Test that non-positive rate or burst values are rejected."""
+        with pytest.raises(ValueError):
+            RateLimiter(rate=rate, burst=burst)
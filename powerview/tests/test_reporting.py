@@ -2,8 +2,10 @@
 
 from __future__ import annotations
 
-from datetime import UTC, datetime, timedelta
+import io
+from datetime import UTC, datetime
 
+import numpy as np
 import pandas as pd
 import pytest
 
@@ -11,42 +13,48 @@ import duckdb
 from powerview.src.reporting import build_reporting_layer
 
 
-def _write_sample_parquet(base_dir):
-    base_ts = datetime(2025, 1, 1, 0, 0, tzinfo=UTC)
-    records = []
-    for hour in range(24):
-        records.append(
-            {
-                "metering_point_id": "meter_001",
-                "timestamp": base_ts + timedelta(hours=hour),
-                "consumption_value": float(hour + 1),
-                "quality": "A",
-                "unit": "kWh",
-                "ingestion_timestamp": base_ts,
-                "ingestion_date": base_ts.date(),
-            }
-        )
+@pytest.fixture(scope="session")
+def sample_parquet_bytes():
+    """Return one day of hourly sample readings encoded as Parquet, built once."""
 
-    df = pd.DataFrame.from_records(records)
+    base_ts = datetime(2025, 1, 1, 0, 0, tzinfo=UTC)
+    frame = pd.DataFrame(
+        {
+            "metering_point_id": "meter_001",
+            "timestamp": pd.date_range(base_ts, periods=24, freq="h"),
+            "consumption_value": np.arange(1, 25, dtype="float64"),
+            "quality": "A",
+            "unit": "kWh",
+            "ingestion_timestamp": base_ts,
+            "ingestion_date": base_ts.date(),
+        }
+    )
+
+    buffer = io.BytesIO()
+    frame.to_parquet(buffer, engine="pyarrow", index=False)
+    return buffer.getvalue()
+
+
+def _write_sample_parquet(base_dir, payload):
     partition_path = base_dir / "metering_point=meter_001" / "date=2025-01-01"
     partition_path.mkdir(parents=True, exist_ok=True)
     file_path = partition_path / "consumption_data.parquet"
-    df.to_parquet(file_path, engine="pyarrow", index=False)
+    file_path.write_bytes(payload)
     return file_path
 
 
-def test_build_reporting_layer_creates_views(tmp_path, monkeypatch):
-    """Ensure the builder wires Parquet data into analytics views."""
+@pytest.fixture(scope="session")
+def built_reporting_con(tmp_path_factory, sample_parquet_bytes):
+    """Build the reporting layer over sample data into an in-memory database once."""
 
-    data_root = tmp_path / "data"
+    data_root = tmp_path_factory.mktemp("reporting") / "data"
     data_root.mkdir()
-    _write_sample_parquet(data_root)
-    analytics_path = tmp_path / "duckdb" / "analytics.duckdb"
+    _write_sample_parquet(data_root, sample_parquet_bytes)
 
-    config = {
-        "data_storage_path": data_root,
-        "analytics_db_path": analytics_path,
-        "metering_points": {
+    connection = duckdb.connect(":memory:")
+    build_reporting_layer(
+        data_path=data_root,
+        metering_points_override={
             "meter_001": {
                 "id": "meter_001",
                 "name": "Solar",
@@ -55,31 +63,54 @@ def test_build_reporting_layer_creates_views(tmp_path, monkeypatch):
                 "description": "Test meter",
             }
         },
-    }
+        connection=connection,
+    )
+    yield connection
+    connection.close()
+
+
+@pytest.mark.parametrize(
+    ("query", "expected"),
+    [
+        ("SELECT SUM(total_kwh) FROM reporting.daily_consumption", [sum(range(1, 25))]),
+        ("SELECT DISTINCT name FROM reporting.meter_metadata_enriched", ["Solar"]),
+        ("SELECT missing_readings FROM reporting.missing_data_summary", [0]),
+    ],
+)
+def test_build_reporting_layer_creates_views(built_reporting_con, query, expected):
+    """Ensure the builder wires Parquet data into analytics views."""
 
-    monkeypatch.setattr("powerview.src.reporting.load_config", lambda: config)
+    # fetchnumpy returns whole columns instead of boxing each row into Python objects
+    (column,) = built_reporting_con.execute(query).fetchnumpy().values()
 
-    build_reporting_layer()
+    assert np.array_equal(column, expected)
 
-    connection = duckdb.connect(analytics_path.as_posix())
-    try:
-        total_kwh = connection.execute(
-            "SELECT SUM(total_kwh) FROM reporting.daily_consumption"
-        ).fetchone()[0]
-        assert total_kwh == sum(range(1, 25))
 
-        metadata_rows = connection.execute(
-            "SELECT DISTINCT name FROM reporting.meter_metadata_enriched"
-        ).fetchall()
-        assert metadata_rows == [("Solar",)]
+def test_build_reporting_layer_leaves_supplied_connection_open(
+    tmp_path, monkeypatch, sample_parquet_bytes
+):
+    """Builder should use a caller-supplied connection without closing it."""
 
-        missing_row = connection.execute(
-            "SELECT missing_readings FROM reporting.missing_data_summary"
-        ).fetchone()[0]
-        assert missing_row == 0
+    data_root = tmp_path / "data"
+    data_root.mkdir()
+    _write_sample_parquet(data_root, sample_parquet_bytes)
+    monkeypatch.setattr("powerview.src.reporting.load_config", lambda: {})
+
+    connection = duckdb.connect(":memory:")
+    try:
+        result = build_reporting_layer(
+            data_path=data_root,
+            metering_points_override={"meter_001": {"id": "meter_001", "name": "Solar"}},
+            connection=connection,
+        )
+        row_count = connection.execute("SELECT COUNT(*) FROM reporting.meter_data_stage").fetchone()
     finally:
         connection.close()
 
+    assert result is None
+    assert row_count == (24,)
+    assert not list(tmp_path.glob("**/*.duckdb"))
+
 
 def test_build_reporting_layer_missing_data_path(tmp_path, monkeypatch):
     """Builder should fail fast when the data directory is absent."""
@@ -95,3 +126,114 @@ def test_build_reporting_layer_missing_data_path(tmp_path, monkeypatch):
 
     with pytest.raises(FileNotFoundError):
         build_reporting_layer()
+
+
+def test_build_reporting_layer_skips_config_with_overrides(
+    tmp_path, monkeypatch, sample_parquet_bytes
+):
+    """Builder should not load configuration when every input is overridden."""
+
+    data_root = tmp_path / "data"
+    data_root.mkdir()
+    _write_sample_parquet(data_root, sample_parquet_bytes)
+    analytics_path = tmp_path / "duckdb" / "analytics.duckdb"
+
+    def _fail():
+        raise AssertionError("load_config should not be called")
+
+    monkeypatch.setattr("powerview.src.reporting.load_config", _fail)
+
+    result = build_reporting_layer(
+        data_path=data_root,
+        analytics_db_path=analytics_path,
+        metering_points_override={"meter_001": {"id": "meter_001", "name": "Solar"}},
+    )
+
+    assert result == analytics_path.resolve()
+
+
+def test_build_reporting_layer_materializes_stage_over_legacy_view(
+    tmp_path, monkeypatch, sample_parquet_bytes
+):
+    """Stage should become a table even when an older build left a view behind."""
+
+    data_root = tmp_path / "data"
+    data_root.mkdir()
+    _write_sample_parquet(data_root, sample_parquet_bytes)
+    analytics_path = tmp_path / "analytics.duckdb"
+
+    connection = duckdb.connect(analytics_path.as_posix())
+    try:
+        connection.execute("CREATE SCHEMA reporting")
+        connection.execute("CREATE VIEW reporting.meter_data_stage AS SELECT 1 AS placeholder")
+    finally:
+        connection.close()
+
+    config = {
+        "data_storage_path": data_root,
+        "analytics_db_path": analytics_path,
+        "metering_points": {"meter_001": {"id": "meter_001", "name": "Solar"}},
+    }
+    monkeypatch.setattr("powerview.src.reporting.load_config", lambda: config)
+
+    build_reporting_layer()
+
+    connection = duckdb.connect(analytics_path.as_posix())
+    try:
+        table_type = connection.execute(
+            """
+            SELECT table_type FROM information_schema.tables
+            WHERE table_schema = 'reporting' AND table_name = 'meter_data_stage'
+            """
+        ).fetchone()[0]
+        row_count = connection.execute("SELECT COUNT(*) FROM reporting.meter_data_clean").fetchone()
+    finally:
+        connection.close()
+
+    assert table_type == "BASE TABLE"
+    assert row_count == (24,)
+
+
+def test_build_reporting_layer_no_parquet_files(tmp_path, monkeypatch):
+    """Builder should fail when the data directory holds no partitions."""
+
+    data_root = tmp_path / "data"
+    data_root.mkdir()
+    config = {
+        "data_storage_path": data_root,
+        "analytics_db_path": tmp_path / "analytics.duckdb",
+        "metering_points": {"meter_001": {"id": "meter_001", "name": "Solar"}},
+    }
+
+    monkeypatch.setattr("powerview.src.reporting.load_config", lambda: config)
+
+    with pytest.raises(FileNotFoundError, match="No Parquet files found"):
+        build_reporting_layer()
+
+
+def test_build_reporting_layer_handles_quotes_in_data_path(
+    tmp_path, monkeypatch, sample_parquet_bytes
+):
+    """The Parquet glob is bound as a parameter, so quotes in paths are safe."""
+
+    data_root = tmp_path / "owner's data"
+    data_root.mkdir()
+    _write_sample_parquet(data_root, sample_parquet_bytes)
+    analytics_path = tmp_path / "analytics.duckdb"
+    config = {
+        "data_storage_path": data_root,
+        "analytics_db_path": analytics_path,
+        "metering_points": {"meter_001": {"id": "meter_001", "name": "Solar"}},
+    }
+
+    monkeypatch.setattr("powerview.src.reporting.load_config", lambda: config)
+
+    build_reporting_layer()
+
+    connection = duckdb.connect(analytics_path.as_posix())
+    try:
+        row_count = connection.execute("SELECT COUNT(*) FROM reporting.meter_data_stage").fetchone()
+    finally:
+        connection.close()
+
+    assert row_count == (24,)
@@ -4,16 +4,38 @@ from datetime import UTC, date, datetime, timedelta
 from unittest.mock import MagicMock, patch
 
 import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
 import pytest
 
+import duckdb
 from powerview.src.storage import (
+    CONSUMPTION_SCHEMA,
+    close_connections,
     get_last_ingestion_date,
     init_duckdb_state,
     save_to_parquet,
     update_last_ingestion_date,
+    update_last_ingestion_dates,
 )
 
 
+@pytest.fixture(autouse=True)
+def _reset_connection_cache():
+    """Ensure cached DuckDB connections never leak between tests."""
+    close_connections()
+    yield
+    close_connections()
+
+
+@pytest.fixture(autouse=True)
+def state_sleeps(monkeypatch):
+    """Record state-write backoff sleeps instead of waiting."""
+    calls = []
+    monkeypatch.setattr("powerview.src.storage.time.sleep", calls.append)
+    return calls
+
+
 class TestInitDuckdbState:
     """Tests for init_duckdb_state function."""
 
@@ -27,6 +49,22 @@ class TestInitDuckdbState:
 
         mock_connect.assert_called_once_with("test.duckdb")
         mock_con.execute.assert_called_once()
+        mock_con.close.assert_not_called()
+
+    @patch("powerview.src.storage.duckdb.connect")
+    def test_connection_reused_across_calls(self, mock_connect):
+        """Test the state helpers share one cached connection per database."""
+        mock_con = MagicMock()
+        mock_con.execute().fetchone.return_value = None
+        mock_connect.return_value = mock_con
+
+        init_duckdb_state("test.duckdb")
+        get_last_ingestion_date("123456789012345678", "test.duckdb")
+        update_last_ingestion_date("123456789012345678", date(2025, 11, 21), "test.duckdb")
+
+        mock_connect.assert_called_once_with("test.duckdb")
+
+        close_connections()
         mock_con.close.assert_called_once()
 
     @patch("powerview.src.storage.duckdb.connect")
@@ -52,7 +90,7 @@ class TestGetLastIngestionDate:
         result = get_last_ingestion_date("123456789012345678", "test.duckdb")
 
         assert result == test_date
-        mock_con.close.assert_called_once()
+        mock_con.close.assert_not_called()
 
     @patch("powerview.src.storage.duckdb.connect")
     def test_get_last_ingestion_date_not_found(self, mock_connect):
@@ -64,7 +102,7 @@ class TestGetLastIngestionDate:
         result = get_last_ingestion_date("123456789012345678", "test.duckdb")
 
         assert result is None
-        mock_con.close.assert_called_once()
+        mock_con.close.assert_not_called()
 
     @patch("powerview.src.storage.duckdb.connect")
     def test_get_last_ingestion_date_error(self, mock_connect):
@@ -89,7 +127,7 @@ class TestUpdateLastIngestionDate:
         update_last_ingestion_date("123456789012345678", test_date, "test.duckdb")
 
         mock_con.execute.assert_called_once()
-        mock_con.close.assert_called_once()
+        mock_con.close.assert_not_called()
 
     @patch("powerview.src.storage.duckdb.connect")
     def test_update_last_ingestion_date_retry_then_success(self, mock_connect):
@@ -106,8 +144,8 @@ class TestUpdateLastIngestionDate:
         assert mock_con.close.call_count == 1
 
     @patch("powerview.src.storage.duckdb.connect")
-    def test_update_last_ingestion_date_max_retries_exceeded(self, mock_connect):
-        """Test max retries exceeded."""
+    def test_update_last_ingestion_date_max_retries_exceeded(self, mock_connect, state_sleeps):
+        """Test max retries exceeded backs off exponentially between attempts."""
         mock_con = MagicMock()
         mock_con.execute.side_effect = Exception("Lock")
         mock_connect.return_value = mock_con
@@ -117,6 +155,93 @@ class TestUpdateLastIngestionDate:
             update_last_ingestion_date("123456789012345678", test_date, "test.duckdb")
 
         assert mock_con.execute.call_count == 3
+        # No sleep after the final attempt; jitter adds at most 50% to each step
+        assert len(state_sleeps) == 2
+        assert 0.05 <= state_sleeps[0] <= 0.075
+        assert 0.1 <= state_sleeps[1] <= 0.15
+
+
+class TestUpdateLastIngestionDates:
+    """Tests for update_last_ingestion_dates function."""
+
+    def test_update_last_ingestion_dates_single_transaction(self, tmp_path):
+        """Test all updates are written through one connection."""
+        db_path = str(tmp_path / "state.duckdb")
+
+        with patch("powerview.src.storage.duckdb.connect", wraps=duckdb.connect) as mock_connect:
+            init_duckdb_state(db_path)
+            update_last_ingestion_dates(
+                [("111", date(2025, 11, 21)), ("222", date(2025, 11, 22))], db_path
+            )
+
+        mock_connect.assert_called_once_with(db_path)
+        assert get_last_ingestion_date("111", db_path) == date(2025, 11, 21)
+        assert get_last_ingestion_date("222", db_path) == date(2025, 11, 22)
+
+    def test_update_last_ingestion_dates_overwrites_existing(self, tmp_path):
+        """Test the batch upsert replaces dates for already tracked meters."""
+        db_path = str(tmp_path / "state.duckdb")
+        init_duckdb_state(db_path)
+        update_last_ingestion_date("111", date(2025, 11, 1), db_path)
+
+        update_last_ingestion_dates([("111", date(2025, 11, 21))], db_path)
+
+        assert get_last_ingestion_date("111", db_path) == date(2025, 11, 21)
+
+    @patch("powerview.src.storage.duckdb.connect")
+    def test_update_last_ingestion_dates_empty_is_noop(self, mock_connect):
+        """Test an empty batch does not open a connection."""
+        update_last_ingestion_dates([], "test.duckdb")
+
+        mock_connect.assert_not_called()
+
+    @patch("powerview.src.storage.duckdb.connect")
+    def test_update_last_ingestion_dates_max_retries_exceeded(self, mock_connect):
+        """Test max retries exceeded closes every connection."""
+        mock_con = MagicMock()
+        mock_con.execute.side_effect = Exception("Lock")
+        mock_connect.return_value = mock_con
+
+        with pytest.raises(Exception):  # noqa B017
+            update_last_ingestion_dates([("111", date(2025, 11, 21))], "test.duckdb")
+
+        assert mock_con.execute.call_count == 3
+        assert mock_con.unregister.call_count == 3
+        assert mock_con.close.call_count == 3
+
+
+NOW = datetime(2025, 11, 15, 12, 0, tzinfo=UTC)
+MP_ID = "571313113150035634"
+OTHER_MP_ID = "571313114500163366"
+
+
+@pytest.fixture
+def make_record():
+    """Return a factory for normalized records with overridable fields."""
+
+    def make(**overrides):
+        record = {
+            "metering_point_id": MP_ID,
+            "timestamp": NOW,
+            "consumption_value": 0.5,
+            "quality": "A04",
+            "unit": "kWh",
+            "ingestion_timestamp": NOW,
+            "ingestion_date": NOW.date(),
+        }
+        record.update(overrides)
+        return record
+
+    return make
+
+
+def _partition_file(base_path, mp_id, consumption_date):
+    return (
+        base_path
+        / f"metering_point={mp_id}"
+        / f"date={consumption_date}"
+        / "consumption_data.parquet"
+    )
 
 
 class TestSaveToParquet:
@@ -131,225 +256,105 @@ class TestSaveToParquet:
         files = list(tmp_path.glob("**/*.parquet"))
         assert len(files) == 0
 
-    def test_save_to_parquet_single_date(self, tmp_path):
-        """Test saving records from a single consumption date."""
-        now = datetime.now(UTC)
-        consumption_date = now.date()
-
+    @pytest.mark.parametrize(
+        ("rows", "expected"),
+        [
+            # Single consumption date
+            (
+                [(MP_ID, timedelta(0), 0.5), (MP_ID, timedelta(minutes=1), 0.6)],
+                {(MP_ID, "2025-11-15"): [0.5, 0.6]},
+            ),
+            # Multiple consumption dates
+            (
+                [(MP_ID, timedelta(0), 0.5), (MP_ID, timedelta(days=1), 0.6)],
+                {(MP_ID, "2025-11-15"): [0.5], (MP_ID, "2025-11-16"): [0.6]},
+            ),
+            # Multiple metering points
+            (
+                [(MP_ID, timedelta(0), 0.5), (OTHER_MP_ID, timedelta(0), 0.7)],
+                {(MP_ID, "2025-11-15"): [0.5], (OTHER_MP_ID, "2025-11-15"): [0.7]},
+            ),
+        ],
+    )
+    def test_save_to_parquet_partition_layout(self, tmp_path, make_record, rows, expected):
+        """Test records land in metering_point=<ID>/date=<YYYY-MM-DD> partitions."""
         records = [
-            {
-                "metering_point_id": "571313113150035634",
-                "timestamp": now,
-                "consumption_value": 0.5,
-                "quality": "A04",
-                "unit": "kWh",
-                "ingestion_timestamp": now,
-                "ingestion_date": consumption_date,
-            },
-            {
-                "metering_point_id": "571313113150035634",
-                "timestamp": now + timedelta(minutes=1),
-                "consumption_value": 0.6,
-                "quality": "A04",
-                "unit": "kWh",
-                "ingestion_timestamp": now,
-                "ingestion_date": consumption_date,
-            },
+            make_record(metering_point_id=mp_id, timestamp=NOW + offset, consumption_value=value)
+            for mp_id, offset, value in rows
         ]
 
         save_to_parquet(records, str(tmp_path))
 
-        # Verify file structure: metering_point=<ID>/date=<YYYY-MM-DD>/consumption_data.parquet
-        expected_path = (
-            tmp_path
-            / "metering_point=571313113150035634"
-            / f"date={consumption_date}"
-            / "consumption_data.parquet"
-        )
-        assert expected_path.exists()
+        assert len(list(tmp_path.glob("**/*.parquet"))) == len(expected)
+        for (mp_id, consumption_date), values in expected.items():
+            df = pd.read_parquet(_partition_file(tmp_path, mp_id, consumption_date))
+            assert df["metering_point_id"].unique().tolist() == [mp_id]
+            assert df["consumption_value"].tolist() == values
 
-        # Verify data
-        df = pd.read_parquet(expected_path)
-        assert len(df) == 2
-        assert list(df["metering_point_id"].unique()) == ["571313113150035634"]
+    def test_save_to_parquet_upsert_duplicate_timestamps(self, tmp_path, make_record):
+        """Test upsert logic with duplicate timestamps."""
+        save_to_parquet([make_record(consumption_value=0.5)], str(tmp_path))
+        # Second save with same timestamp but different value (upsert)
+        save_to_parquet([make_record(consumption_value=0.6)], str(tmp_path))
 
-    def test_save_to_parquet_multiple_dates(self, tmp_path):
-        """Test saving records spanning multiple consumption dates."""
-        now = datetime.now(UTC)
-        date_1 = now.date()
-        date_2 = (now + timedelta(days=1)).date()
+        # Verify only one record with updated value
+        df = pd.read_parquet(_partition_file(tmp_path, MP_ID, "2025-11-15"))
+        assert df["consumption_value"].tolist() == [0.6]
 
-        records = [
-            {
-                "metering_point_id": "571313113150035634",
-                "timestamp": now,
-                "consumption_value": 0.5,
-                "quality": "A04",
-                "unit": "kWh",
-                "ingestion_timestamp": now,
-                "ingestion_date": date_1,
-            },
-            {
-                "metering_point_id": "571313113150035634",
-                "timestamp": now + timedelta(days=1),
-                "consumption_value": 0.6,
-                "quality": "A04",
-                "unit": "kWh",
-                "ingestion_timestamp": now,
-                "ingestion_date": date_2,
-            },
-        ]
+    def test_save_to_parquet_preserves_schema(self, tmp_path, make_record):
+        """Test that saved Parquet preserves all schema fields."""
+        save_to_parquet([make_record()], str(tmp_path))
+
+        path = _partition_file(tmp_path, MP_ID, "2025-11-15")
+        # Verify the file carries exactly the fixed consumption schema
+        assert pq.read_schema(path).equals(CONSUMPTION_SCHEMA)
+        assert pq.ParquetFile(path).metadata.row_group(0).column(0).compression == "ZSTD"
+
+    def test_save_to_parquet_accepts_arrow_table(self, tmp_path, make_record):
+        """Test saving a pyarrow Table upserts into a partition written from dicts."""
+        save_to_parquet(
+            [
+                make_record(consumption_value=0.5),
+                make_record(timestamp=NOW + timedelta(hours=1), consumption_value=0.7),
+            ],
+            str(tmp_path),
+        )
 
-        save_to_parquet(records, str(tmp_path))
+        table = pa.Table.from_pylist([make_record(consumption_value=0.6)])
+        save_to_parquet(table, str(tmp_path))
 
-        # Verify separate folders for each consumption date
-        path_1 = (
-            tmp_path
-            / "metering_point=571313113150035634"
-            / f"date={date_1}"
-            / "consumption_data.parquet"
-        )
-        path_2 = (
-            tmp_path
-            / "metering_point=571313113150035634"
-            / f"date={date_2}"
-            / "consumption_data.parquet"
-        )
-        assert path_1.exists()
-        assert path_2.exists()
-
-        # Verify data in each file
-        df_1 = pd.read_parquet(path_1)
-        df_2 = pd.read_parquet(path_2)
-        assert len(df_1) == 1
-        assert len(df_2) == 1
-        assert float(df_1["consumption_value"].iloc[0]) == 0.5
-        assert float(df_2["consumption_value"].iloc[0]) == 0.6
-
-    def test_save_to_parquet_multiple_metering_points(self, tmp_path):
-        """Test saving records from multiple metering points."""
-        now = datetime.now(UTC)
-        consumption_date = now.date()
+        df = pd.read_parquet(_partition_file(tmp_path, MP_ID, "2025-11-15"))
+        assert df["consumption_value"].tolist() == [0.6, 0.7]
 
+    def test_save_to_parquet_unsorted_input_partitions(self, tmp_path, make_record):
+        """Test unsorted records across meters and dates land in sorted partitions."""
+        base = datetime(2025, 11, 15, 22, 0, tzinfo=UTC)
         records = [
-            {
-                "metering_point_id": "571313113150035634",
-                "timestamp": now,
-                "consumption_value": 0.5,
-                "quality": "A04",
-                "unit": "kWh",
-                "ingestion_timestamp": now,
-                "ingestion_date": consumption_date,
-            },
-            {
-                "metering_point_id": "571313114500163366",
-                "timestamp": now,
-                "consumption_value": 0.7,
-                "quality": "A04",
-                "unit": "kWh",
-                "ingestion_timestamp": now,
-                "ingestion_date": consumption_date,
-            },
+            make_record(
+                metering_point_id=mp_id,
+                timestamp=base + timedelta(hours=hour),
+                consumption_value=float(hour),
+            )
+            for hour in (3, 0, 2, 1)
+            for mp_id in ("222", "111")
         ]
 
         save_to_parquet(records, str(tmp_path))
 
-        # Verify separate folders for each metering point
-        path_1 = (
-            tmp_path
-            / "metering_point=571313113150035634"
-            / f"date={consumption_date}"
-            / "consumption_data.parquet"
-        )
-        path_2 = (
-            tmp_path
-            / "metering_point=571313114500163366"
-            / f"date={consumption_date}"
-            / "consumption_data.parquet"
-        )
-        assert path_1.exists()
-        assert path_2.exists()
-
-    def test_save_to_parquet_upsert_duplicate_timestamps(self, tmp_path):
-        """Test upsert logic with duplicate timestamps."""
-        now = datetime.now(UTC)
-        consumption_date = now.date()
-        mp_id = "571313113150035634"
-
-        # First save
-        records_1 = [
-            {
-                "metering_point_id": mp_id,
-                "timestamp": now,
-                "consumption_value": 0.5,
-                "quality": "A04",
-                "unit": "kWh",
-                "ingestion_timestamp": now,
-                "ingestion_date": consumption_date,
-            }
-        ]
-        save_to_parquet(records_1, str(tmp_path))
+        for mp_id in ("111", "222"):
+            day_1 = pd.read_parquet(_partition_file(tmp_path, mp_id, "2025-11-15"))
+            day_2 = pd.read_parquet(_partition_file(tmp_path, mp_id, "2025-11-16"))
+            assert day_1["consumption_value"].tolist() == [0.0, 1.0]
+            assert day_2["consumption_value"].tolist() == [2.0, 3.0]
 
-        # Second save with same timestamp but different value (upsert)
-        records_2 = [
-            {
-                "metering_point_id": mp_id,
-                "timestamp": now,
-                "consumption_value": 0.6,  # Different value
-                "quality": "A04",
-                "unit": "kWh",
-                "ingestion_timestamp": now,
-                "ingestion_date": consumption_date,
-            }
-        ]
-        save_to_parquet(records_2, str(tmp_path))
+    def test_save_to_parquet_full_overlap_skips_full_read(self, tmp_path, make_record):
+        """Test a batch replacing every stored timestamp only reads the timestamp column."""
+        save_to_parquet([make_record()], str(tmp_path))
 
-        # Verify only one record with updated value
-        path = (
-            tmp_path
-            / f"metering_point={mp_id}"
-            / f"date={consumption_date}"
-            / "consumption_data.parquet"
-        )
-        df = pd.read_parquet(path)
-        assert len(df) == 1
-        assert float(df["consumption_value"].iloc[0]) == 0.6
+        with patch("powerview.src.storage.pq.read_table", wraps=pq.read_table) as mock_read:
+            save_to_parquet([make_record(consumption_value=0.9)], str(tmp_path))
 
-    def test_save_to_parquet_preserves_schema(self, tmp_path):
-        """Test that saved Parquet preserves all schema fields."""
-        now = datetime.now(UTC)
-        consumption_date = now.date()
-
-        records = [
-            {
-                "metering_point_id": "571313113150035634",
-                "timestamp": now,
-                "consumption_value": 0.5,
-                "quality": "A04",
-                "unit": "kWh",
-                "ingestion_timestamp": now,
-                "ingestion_date": consumption_date,
-            }
-        ]
-
-        save_to_parquet(records, str(tmp_path))
-
-        path = (
-            tmp_path
-            / "metering_point=571313113150035634"
-            / f"date={consumption_date}"
-            / "consumption_data.parquet"
-        )
-        df = pd.read_parquet(path)
-
-        # Verify all schema fields are present
-        expected_columns = {
-            "metering_point_id",
-            "timestamp",
-            "consumption_value",
-            "quality",
-            "unit",
-            "ingestion_timestamp",
-            "ingestion_date",
-        }
-        assert set(df.columns) == expected_columns
+        mock_read.assert_called_once()
+        assert mock_read.call_args[1]["columns"] == ["timestamp"]
+        path = next(tmp_path.glob("**/consumption_data.parquet"))
+        assert pd.read_parquet(path)["consumption_value"].tolist() == [0.9]
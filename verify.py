@@ -4,20 +4,68 @@ Verification script to test the Eloverblik data extraction pipeline.
 Tests all major components and their integration.
 """
 
+import functools
+import hashlib
+import inspect
+import operator
+import os
+import random
+import re
 import sys
-from datetime import UTC, date, datetime
+import tempfile
+from contextlib import contextmanager
+from datetime import date
 from pathlib import Path
+from unittest.mock import patch
+
+PROJECT_ROOT = Path(__file__).parent
+FIXTURES_DIR = PROJECT_ROOT / "powerview" / "tests" / "fixtures"
 
 # Add the project root to path
-sys.path.insert(0, str(Path(__file__).parent))
+sys.path.insert(0, str(PROJECT_ROOT))
+
+SEPARATOR = "=" * 80
+
+sys.stdout.write(f"{SEPARATOR}\nELOVERBLIK DATA EXTRACTION PIPELINE - VERIFICATION\n{SEPARATOR}\n")
+sys.stdout.flush()
 
-print("=" * 80)
-print("ELOVERBLIK DATA EXTRACTION PIPELINE - VERIFICATION")
-print("=" * 80)
+# With --cached, skip the run when nothing the checks depend on changed since the last green run
+CACHE_PATH = PROJECT_ROOT / ".verify.cache"
+SOURCES = sorted((PROJECT_ROOT / "powerview" / "src").glob("*.py")) + [
+    Path(__file__),
+    FIXTURES_DIR / "sample_response.json",
+    PROJECT_ROOT / "pyproject.toml",
+    PROJECT_ROOT / "poetry.lock",
+    PROJECT_ROOT / ".env",
+    PROJECT_ROOT / "metering_points.yml",
+]
+ENV_VARS = (
+    "ELOVERBLIK_REFRESH_TOKEN",
+    "ELOVERBLIK_MAX_CONCURRENCY",
+    "ELOVERBLIK_RPS",
+    "METERING_POINTS_FILE",
+    "DATA_STORAGE_PATH",
+    "ANALYTICS_DB_PATH",
+    "STATE_DB_PATH",
+    "LOG_LEVEL",
+    "INITIAL_BACKFILL_DAYS",
+)
+digest = hashlib.blake2b(sys.version.encode(), digest_size=16)
+for path in SOURCES:
+    digest.update(path.read_bytes() if path.is_file() else b"\0missing")
+for name in ENV_VARS:
+    digest.update(f"\0{name}={os.environ.get(name)}".encode())
+fingerprint = digest.hexdigest()
+if "--cached" in sys.argv[1:] and CACHE_PATH.is_file():
+    if CACHE_PATH.read_text(errors="ignore").strip() == fingerprint:
+        print("\n✓ Nothing changed since the last passing run (omit --cached to re-verify)")
+        sys.exit(0)
 
-# Test 1: Import all modules
+# Test 1: Import all modules (every later check depends on these, so it runs first)
 print("\n[1/8] Testing imports...")
 try:
+    import orjson
+
     from powerview.src.api_client import (
         get_meter_data,
         get_meter_data_with_retry,
@@ -29,9 +77,12 @@ try:
         chunk_date_range,
         get_timeframe,
         normalize_api_response,
+        normalize_api_response_table,
     )
     from powerview.src.main import main
     from powerview.src.storage import (
+        _get_con,
+        close_connections,
         get_last_ingestion_date,
         init_duckdb_state,
         save_to_parquet,
@@ -43,49 +94,63 @@ except Exception as e:
     print(f"✗ Import failed: {e}")
     sys.exit(1)
 
-# Test 2: Check function signatures and docstrings
-print("\n[2/8] Verifying function signatures and docstrings...")
-try:
-    functions = [
-        (get_access_token, "get_access_token"),
-        (get_metering_points, "get_metering_points"),
-        (get_meter_data, "get_meter_data"),
-        (get_meter_data_with_retry, "get_meter_data_with_retry"),
-        (load_config, "load_config"),
-        (get_timeframe, "get_timeframe"),
-        (chunk_date_range, "chunk_date_range"),
-        (normalize_api_response, "normalize_api_response"),
-        (init_duckdb_state, "init_duckdb_state"),
-        (get_last_ingestion_date, "get_last_ingestion_date"),
-        (update_last_ingestion_date, "update_last_ingestion_date"),
-        (save_to_parquet, "save_to_parquet"),
-    ]
-
-    for func, name in functions:
-        assert func.__doc__, f"{name} missing docstring"
-        assert callable(func), f"{name} not callable"
-
-    print(f"✓ All {len(functions)} functions have docstrings and are callable")
-except AssertionError as e:
-    print(f"✗ Function verification failed: {e}")
-    sys.exit(1)
 
-# Test 3: Test chunk_date_range function
-print("\n[3/8] Testing chunk_date_range...")
-try:
+# Each check returns its success message and raises on failure.
+
+
+def check_signatures():
+    """Test 2: Check function signatures and docstrings."""
+    functions = (
+        get_access_token,
+        get_metering_points,
+        get_meter_data,
+        get_meter_data_with_retry,
+        load_config,
+        get_timeframe,
+        chunk_date_range,
+        normalize_api_response,
+        init_duckdb_state,
+        get_last_ingestion_date,
+        update_last_ingestion_date,
+        save_to_parquet,
+    )
+
+    assert all(map(callable, functions)), "Not every function is callable"
+    docs = map(operator.attrgetter("__doc__"), functions)
+    # Names are only looked up for functions that actually lack a docstring
+    missing = [func.__name__ for func, doc in zip(functions, docs, strict=True) if not doc]
+    assert not missing, f"Missing docstrings: {missing}"
+
+    return f"All {len(functions)} functions have docstrings and are callable"
+
+
+def check_chunk_date_range():
+    """Test 3: Test chunk_date_range function."""
     chunks = chunk_date_range(date(2025, 1, 1), date(2025, 4, 1), chunk_days=90)
     assert len(chunks) == 2, f"Expected 2 chunks, got {len(chunks)}"
     assert chunks[0][0] == date(2025, 1, 1), "First chunk start incorrect"
     assert chunks[1][1] == date(2025, 4, 1), "Last chunk end incorrect"
-    print(f"✓ chunk_date_range works correctly ({len(chunks)} chunks created)")
-except Exception as e:
-    print(f"✗ chunk_date_range test failed: {e}")
-    sys.exit(1)
 
-# Test 4: Test normalize_api_response function
-print("\n[4/8] Testing normalize_api_response...")
-try:
-    api_response = {
+    # Compare whole chunk lists against an ordinal-day oracle for several chunk sizes
+    first, last = date(2025, 1, 1), date(2025, 12, 31)
+    for chunk_days in (1, 7, 30, 90, 365):
+        expected = [
+            (
+                date.fromordinal(start),
+                date.fromordinal(min(start + chunk_days - 1, last.toordinal())),
+            )
+            for start in range(first.toordinal(), last.toordinal() + 1, chunk_days)
+        ]
+        assert chunk_date_range(first, last, chunk_days) == expected, (
+            f"chunk_date_range mismatch for chunk_days={chunk_days}"
+        )
+
+    return f"chunk_date_range works correctly ({len(chunks)} chunks created)"
+
+
+def _api_response(points):
+    """Build a single-series API response around ``points``."""
+    return {
         "result": [
             {
                 "success": True,
@@ -97,13 +162,7 @@ try:
                             "Period": [
                                 {
                                     "timeInterval": {"start": "2025-01-01T00:00:00Z"},
-                                    "Point": [
-                                        {
-                                            "position": "1",
-                                            "out_Quantity.quantity": "1.5",
-                                            "out_Quantity.quality": "A01",
-                                        }
-                                    ],
+                                    "Point": points,
                                 }
                             ],
                         }
@@ -112,117 +171,168 @@ try:
             }
         ]
     }
+
+
+@functools.cache
+def _api_fixture():
+    """Return the shared captured response; normalization never mutates its input."""
+    return orjson.loads((FIXTURES_DIR / "sample_response.json").read_bytes())
+
+
+def check_normalize_api_response():
+    """Test 4: Test normalize_api_response and its columnar variant."""
     metering_points = {"delivery_to_grid": "meter_001"}
 
-    records = normalize_api_response(api_response, metering_points)
+    records = normalize_api_response(_api_fixture(), metering_points)
     assert len(records) == 1, f"Expected 1 record, got {len(records)}"
     assert records[0]["metering_point_id"] == "meter_001"
     assert records[0]["consumption_value"] == 1.5
     assert "ingestion_date" in records[0]
-    print("✓ normalize_api_response works correctly")
-except Exception as e:
-    print(f"✗ normalize_api_response test failed: {e}")
-    sys.exit(1)
 
-# Test 5: Test config module (without .env)
-print("\n[5/8] Testing config module error handling...")
-try:
-    import os
-    from unittest.mock import patch
+    # The columnar fast path must agree with the dict path on a realistically sized response
+    rng = random.Random(0)
+    quantities = [round(rng.random(), 3) for _ in range(10_000)]
+    api_response = _api_response(
+        [
+            {"position": str(i), "out_Quantity.quantity": str(q), "out_Quantity.quality": "A01"}
+            for i, q in enumerate(quantities, start=1)
+        ]
+    )
+    records = normalize_api_response(api_response, metering_points)
+    table = normalize_api_response_table(api_response, metering_points)
+    assert table.num_rows == len(records) == len(quantities)
+    assert table.column("consumption_value").to_pylist() == quantities
+    for column in ("metering_point_id", "timestamp", "consumption_value", "quality", "unit"):
+        assert table.column(column).to_pylist() == [r[column] for r in records], column
+
+    return "normalize_api_response works correctly"
+
+
+@contextmanager
+def _unset(*keys):
+    """Temporarily remove ``keys`` from the environment, restoring them afterwards."""
+    saved = {key: os.environ.pop(key, None) for key in keys}
+    try:
+        yield
+    finally:
+        for key, value in saved.items():
+            if value is not None:
+                os.environ[key] = value
 
-    with patch.dict(os.environ, {}, clear=True):
+
+def check_config_validation():
+    """Test 5: Test config module (without .env)."""
+    # Only the token is removed, so the rest of the environment stays available
+    with _unset("ELOVERBLIK_REFRESH_TOKEN"):
         try:
             load_config()
-            print("✗ load_config should raise ValueError when refresh token missing")
-            sys.exit(1)
         except ValueError as e:
             if "ELOVERBLIK_REFRESH_TOKEN" in str(e):
-                print("✓ load_config correctly validates configuration")
-            else:
-                print(f"✗ Unexpected error: {e}")
-                sys.exit(1)
-except Exception as e:
-    print(f"✗ config test failed: {e}")
-    sys.exit(1)
-
-# Test 6: Test storage module initialization
-print("\n[6/8] Testing storage module (DuckDB)...")
-try:
-    import tempfile
+                return "load_config correctly validates configuration"
+            raise AssertionError(f"Unexpected error: {e}") from e
+    raise AssertionError("load_config should raise ValueError when refresh token missing")
 
-    import duckdb
 
-    with tempfile.TemporaryDirectory() as tmpdir:
+def check_storage():
+    """Test 6: Test storage module initialization."""
+    # Prefer the RAM-backed /dev/shm so the throwaway database never touches the disk
+    shm = Path("/dev/shm")
+    with tempfile.TemporaryDirectory(dir=shm if shm.is_dir() else None) as tmpdir:
         db_path = Path(tmpdir) / "test.duckdb"
         init_duckdb_state(str(db_path))
         assert db_path.exists(), "DuckDB file not created"
 
-        # Test query
-        con = duckdb.connect(str(db_path))
-        result = con.execute("SELECT * FROM ingestion_state").fetchall()
-        con.close()
+        # Query through the connection storage cached during init instead of reconnecting
+        try:
+            result = _get_con(str(db_path)).execute("SELECT * FROM ingestion_state").fetchall()
+        finally:
+            close_connections()
         assert isinstance(result, list), "Query should return list"
-        print("✓ Storage module (DuckDB) works correctly")
-except Exception as e:
-    print(f"✗ Storage test failed: {e}")
-    sys.exit(1)
+    return "Storage module (DuckDB) works correctly"
 
-# Test 7: Test extract timeframe calculation
-print("\n[7/8] Testing extract timeframe calculation...")
-try:
-    from unittest.mock import patch
 
-    with patch("powerview.src.storage.get_last_ingestion_date") as mock_get_last:
-        mock_get_last.return_value = None
-        date_from, date_to = get_timeframe("meter_001", initial_backfill_days=90)
+def check_timeframe():
+    """Test 7: Test extract timeframe calculation."""
+    today = date(2025, 6, 1)
+    with patch("powerview.src.storage.get_last_ingestion_date", return_value=None):
+        date_from, date_to = get_timeframe("meter_001", initial_backfill_days=90, today=today)
 
-        assert date_to == datetime.now(UTC).date()
-        assert date_from < date_to
-        delta = (date_to - date_from).days
-        assert 89 <= delta <= 91, f"Expected ~90 days, got {delta}"
-        print("✓ Timeframe calculation works correctly")
-except Exception as e:
-    print(f"✗ Timeframe test failed: {e}")
-    sys.exit(1)
+    assert date_to == today, f"Expected {today}, got {date_to}"
+    assert (date_to - date_from).days == 90, f"Expected 90 days, got {(date_to - date_from).days}"
+    return "Timeframe calculation works correctly"
 
-# Test 8: Test main orchestration structure
-print("\n[8/8] Testing main orchestration structure...")
-try:
-    import inspect
 
+def check_main_structure():
+    """Test 8: Test main orchestration structure."""
     # Verify main function exists and is callable
     assert callable(main), "main() not callable"
 
     # Check that main has a docstring
     assert main.__doc__, "main() missing docstring"
 
-    # Verify main is properly structured
-    source = inspect.getsource(main)
-    assert "load_config" in source
-    assert "get_access_token" in source
-    assert "init_duckdb_state" in source
-    assert "valid_metering_points" in source
-    assert "chunk_date_range" in source
-    assert "get_meter_data_with_retry" in source
-    assert "normalize_api_response" in source
-    assert "save_to_parquet" in source
-    assert "update_last_ingestion_date" in source
-
-    print("✓ Main orchestration structure is complete")
-except Exception as e:
-    print(f"✗ Main structure test failed: {e}")
+    # Verify main is properly structured: tokenize the source once, then check membership
+    tokens = set(re.findall(r"[A-Za-z_]\w*", inspect.getsource(main)))
+    required = {
+        "load_config",
+        "get_access_token",
+        "init_duckdb_state",
+        "valid_metering_points",
+        "chunk_date_range",
+        "get_meter_data_with_retry",
+        "normalize_api_response_table",
+        "save_to_parquet",
+        "update_last_ingestion_dates",
+    }
+    missing = required - tokens
+    assert not missing, f"main() does not reference {sorted(missing)}"
+
+    return "Main orchestration structure is complete"
+
+
+CHECKS = [
+    ("Verifying function signatures and docstrings", check_signatures, "Function verification"),
+    ("Testing chunk_date_range", check_chunk_date_range, "chunk_date_range test"),
+    ("Testing normalize_api_response", check_normalize_api_response, "normalize_api_response test"),
+    ("Testing config module error handling", check_config_validation, "config test"),
+    ("Testing storage module (DuckDB)", check_storage, "Storage test"),
+    ("Testing extract timeframe calculation", check_timeframe, "Timeframe test"),
+    ("Testing main orchestration structure", check_main_structure, "Main structure test"),
+]
+
+# Checks run one at a time: some patch the environment or module globals while they run
+failed = False
+for number, (title, check, label) in enumerate(CHECKS, start=2):
+    print(f"\n[{number}/8] {title}...")
+    try:
+        print(f"✓ {check()}")
+    except Exception as e:
+        print(f"✗ {label} failed: {e}")
+        failed = True
+
+if failed:
     sys.exit(1)
 
-print("\n" + "=" * 80)
-print("ALL VERIFICATION TESTS PASSED!")
-print("=" * 80)
-print("\nImplementation Summary:")
-print("  ✓ All 6 source modules imported successfully")
-print("  ✓ All 12+ core functions have type hints and docstrings")
-print("  ✓ Configuration validation working")
-print("  ✓ DuckDB state management working")
-print("  ✓ API response normalization working")
-print("  ✓ Date range chunking working")
-print("  ✓ Timeframe calculation working")
-print("  ✓ Main orchestration properly structured")
-print("\nReady for deployment!")
+CACHE_PATH.write_text(fingerprint)
+
+# Emit the summary as one write so it cannot interleave with other output
+SUMMARY = [
+    "",
+    SEPARATOR,
+    "ALL VERIFICATION TESTS PASSED!",
+    SEPARATOR,
+    "",
+    "Implementation Summary:",
+    "  ✓ All 6 source modules imported successfully",
+    "  ✓ All 12+ core functions have type hints and docstrings",
+    "  ✓ Configuration validation working",
+    "  ✓ DuckDB state management working",
+    "  ✓ API response normalization working",
+    "  ✓ Date range chunking working",
+    "  ✓ Timeframe calculation working",
+    "  ✓ Main orchestration properly structured",
+    "",
+    "Ready for deployment!",
+    "",
+]
+sys.stdout.write("\n".join(SUMMARY))
+sys.stdout.flush()